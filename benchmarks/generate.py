@@ -0,0 +1,125 @@
+"""Write synthetic wreqs projects made of markdown specs.
+
+The specs use the markdown subset the docx transforms produce, with
+transforms = [] in wreqs.toml, so no pandoc or Word documents are needed.
+"""
+import argparse
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+
+WORDS = ("the system shall provide a value to each output within the limit "
+         "when power is applied and report status on request").split()
+
+DELETED_TEXT = "Deleted."
+
+
+@dataclass
+class ProjectShape:
+    docs: int = 8
+    reqs_per_doc: int = 1000
+    trace_fanout: int = 2       # Parent IDs per traced requirement
+    signal_density: float = 1.0  # Signal references per requirement
+    signals: int = 500           # Distinct signal names
+    deleted_ratio: float = 0.02
+    branching: int = 2           # Child documents per parent document
+    seed: int = 0
+
+
+def doc_ids(shape: ProjectShape) -> list[str]:
+    return [f"doc{i}" for i in range(shape.docs)]
+
+
+def parent_of(i: int, shape: ProjectShape):
+    return None if i == 0 else f"doc{(i - 1) // shape.branching}"
+
+
+def req_text(rng: random.Random, shape: ProjectShape) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 24))
+    for _ in range(int(shape.signal_density) + (rng.random() < shape.signal_density % 1)):
+        style = rng.choice(["Signal", "ModSignal"])
+        signal = f"Signal {rng.randrange(shape.signals)}"
+        words.insert(rng.randrange(len(words)), f'[{signal}]{{custom-style="{style}"}}')
+    return " ".join(words) + "."
+
+
+def write_spec(path: Path, doc_id: str, parent, shape: ProjectShape, rng: random.Random):
+    with open(path, "w", encoding="utf8") as f:
+        f.write(f"# {doc_id} requirements\n\n")
+        for n in range(1, shape.reqs_per_doc + 1):
+            if n % 50 == 1:
+                f.write(f"## Section {n // 50 + 1}\n\n")
+
+            meta = f"{doc_id}-{n}"
+            if parent is not None:
+                parents = {rng.randint(1, shape.reqs_per_doc)
+                           for _ in range(shape.trace_fanout)}
+                meta += " → " + ", ".join(f"{parent}-{p}" for p in sorted(parents))
+            f.write(f"\\[{meta}\\]\n\n")
+
+            if rng.random() < shape.deleted_ratio:
+                f.write(f"{DELETED_TEXT}\n\n")
+            else:
+                f.write(f"{req_text(rng, shape)}\n\n")
+
+
+def write_project(root, shape: ProjectShape):
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(shape.seed)
+
+    config = []
+    for i, doc_id in enumerate(doc_ids(shape)):
+        parent = parent_of(i, shape)
+        write_spec(root / f"{doc_id}.md", doc_id, parent, shape, rng)
+
+        config.append(f"[docs.{doc_id}]")
+        config.append(f'file = "{doc_id}.md"')
+        config.append("transforms = []")
+        config.append(f'req_id_prefix = "{doc_id}-"')
+        config.append(f'deleted = "{DELETED_TEXT}"')
+        if parent is not None:
+            config.append(f'parent = "{parent}"')
+        config.append("")
+
+    for i, doc_id in enumerate(doc_ids(shape)):
+        children = [child for j, child in enumerate(doc_ids(shape))
+                    if parent_of(j, shape) == doc_id]
+        if children:
+            config.append(f"[traces.{doc_id}-down]")
+            config.append('direction = "down"')
+            config.append(f'from = "{doc_id}"')
+            config.append(f"to = [{', '.join(repr(c) for c in children)}]".replace("'", '"'))
+            config.append("")
+
+    (root / "wreqs.toml").write_text("\n".join(config), encoding="utf8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("root")
+    parser.add_argument("--docs", type=int, default=ProjectShape.docs)
+    parser.add_argument("--reqs-per-doc", type=int, default=ProjectShape.reqs_per_doc)
+    parser.add_argument("--trace-fanout", type=int, default=ProjectShape.trace_fanout)
+    parser.add_argument("--signal-density", type=float, default=ProjectShape.signal_density)
+    parser.add_argument("--signals", type=int, default=ProjectShape.signals)
+    parser.add_argument("--deleted-ratio", type=float, default=ProjectShape.deleted_ratio)
+    parser.add_argument("--branching", type=int, default=ProjectShape.branching)
+    parser.add_argument("--seed", type=int, default=ProjectShape.seed)
+    args = parser.parse_args()
+
+    write_project(args.root, ProjectShape(
+        docs=args.docs,
+        reqs_per_doc=args.reqs_per_doc,
+        trace_fanout=args.trace_fanout,
+        signal_density=args.signal_density,
+        signals=args.signals,
+        deleted_ratio=args.deleted_ratio,
+        branching=args.branching,
+        seed=args.seed,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Time the main pipeline stages on synthetic projects.
+
+Usage: python -m benchmarks.run --scales 100 1000 10000 --out results.json
+
+Each scale is the number of requirements per document. Stages run once for
+timing and once under tracemalloc for peak memory, since tracing slows the
+code it measures. Markdown specs need no transforms, so no pandoc is needed.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tomllib
+import tracemalloc
+from pathlib import Path
+
+from wordreqs2.config import ProjConfig
+from wordreqs2.cache import TMP_DIR
+from wordreqs2 import md_spec
+from wordreqs2.load import ReqDB
+from wordreqs2.lint import build_lint_table, check_lints
+from wordreqs2.prepare import run_prepare
+from wordreqs2.status import run_status, run_status_from_summaries
+from wordreqs2.trace import run_traces
+
+from .generate import ProjectShape, doc_ids, write_project
+
+
+def clear_caches(pattern: str):
+    for path in TMP_DIR.glob(pattern):
+        path.unlink()
+
+
+def stages(config: ProjConfig) -> list:
+    """(name, setup, run) for each stage, in pipeline order."""
+    state = {}
+
+    def parse():
+        for doc_id in config.docs:
+            md_spec.parse_file(TMP_DIR / f"{doc_id}.md")
+
+    def build_db():
+        state["db"] = ReqDB(config)
+
+    def lints():
+        check_lints(state["db"], config)
+
+    def traces():
+        run_traces(state["db"], config)
+
+    def status():
+        run_status(state["db"], config)
+
+    def status_summaries():
+        run_status_from_summaries(config)
+
+    return [
+        ("parse", lambda: None, parse),
+        ("reqdb_cold", lambda: clear_caches("*.spec"), build_db),
+        ("reqdb_warm", lambda: None, build_db),
+        ("lint_cold", lambda: clear_caches("*.lint.json"), lints),
+        ("lint_warm", lambda: None, lints),
+        ("lint_uncached", lambda: None,
+         lambda: build_lint_table(state["db"], config, use_cache=False)),
+        ("trace", lambda: None, traces),
+        ("status", lambda: None, status),
+        # What wreqs status runs, without building the ReqDB.
+        ("status_summaries_cold", lambda: clear_caches("*.summary.json"), status_summaries),
+        ("status_summaries_warm", lambda: None, status_summaries),
+    ]
+
+
+def measure(config: ProjConfig) -> dict:
+    results = {}
+    for traced in (False, True):
+        for name, setup, run in stages(config):
+            setup()
+            # Reports are printed, so keep them out of the benchmark output.
+            with contextlib.redirect_stdout(io.StringIO()):
+                if traced:
+                    tracemalloc.start()
+                    run()
+                    results[name]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                else:
+                    start = time.perf_counter()
+                    run()
+                    results[name] = {"seconds": time.perf_counter() - start}
+    return results
+
+
+def run_scale(shape: ProjectShape) -> dict:
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        write_project(root, shape)
+        os.chdir(root)
+        try:
+            config = ProjConfig.from_dict(tomllib.load(open("wreqs.toml", "rb")))
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_prepare(config.docs)
+            stage_results = measure(config)
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "docs": shape.docs,
+        "reqs_per_doc": shape.reqs_per_doc,
+        "total_reqs": shape.docs * shape.reqs_per_doc,
+        "stages": stage_results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="requirements per document at each scale")
+    parser.add_argument("--docs", type=int, default=ProjectShape.docs)
+    parser.add_argument("--trace-fanout", type=int, default=ProjectShape.trace_fanout)
+    parser.add_argument("--signal-density", type=float, default=ProjectShape.signal_density)
+    parser.add_argument("--signals", type=int, default=ProjectShape.signals)
+    parser.add_argument("--deleted-ratio", type=float, default=ProjectShape.deleted_ratio)
+    parser.add_argument("--branching", type=int, default=ProjectShape.branching)
+    parser.add_argument("--seed", type=int, default=ProjectShape.seed)
+    parser.add_argument("--out", help="JSON file for the results, default stdout")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scales": [],
+    }
+    for scale in args.scales:
+        shape = ProjectShape(
+            docs=args.docs,
+            reqs_per_doc=scale,
+            trace_fanout=args.trace_fanout,
+            signal_density=args.signal_density,
+            signals=args.signals,
+            deleted_ratio=args.deleted_ratio,
+            branching=args.branching,
+            seed=args.seed,
+        )
+        results["scales"].append(run_scale(shape))
+        print(f"⏱️ Measured {len(doc_ids(shape))} docs x {scale} reqs", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(output + "\n", encoding="utf8")
+    else:
+        print(output)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import shutil
+import tomllib
+import pytest
+from wordreqs2.config import ProjConfig
+from wordreqs2.prepare import run_prepare
+
+
+@pytest.fixture
+def md_project_dir(tmp_path):
+    """A copy of tests/examples/md_project in tmp_path."""
+    shutil.copytree("tests/examples/md_project", tmp_path, dirs_exist_ok=True)
+    return tmp_path
+
+
+@pytest.fixture
+def md_project(md_project_dir, monkeypatch) -> ProjConfig:
+    """Config of the md_project copy, run from its folder with its docs prepared."""
+    monkeypatch.chdir(md_project_dir)
+    config = ProjConfig.from_dict(tomllib.load(open("wreqs.toml", "rb")))
+    run_prepare(config.docs)
+    return config
@@ -0,0 +1,72 @@
+import json
+import marshal
+import shutil
+from pathlib import Path
+import pytest
+from wordreqs2.batch import find_projects, run_batch
+
+
+def make_projects(tmp_path, monkeypatch, names):
+    for name in names:
+        shutil.copytree("tests/examples/md_project", tmp_path / "specs" / name)
+    monkeypatch.chdir(tmp_path)
+
+
+def test_find_projects(tmp_path, monkeypatch):
+    make_projects(tmp_path, monkeypatch, ["a", "b"])
+    (tmp_path / "specs" / "empty").mkdir()
+
+    assert find_projects(["specs/*"]) == [Path("specs/a"), Path("specs/b")]
+    assert find_projects(["specs/**/wreqs.toml", "specs/a"]) == [Path("specs/a"), Path("specs/b")]
+
+    for patterns in [["nope/*"], ["specs/*", "specs/empty"]]:
+        with pytest.raises(ValueError, match="No wreqs.toml"):
+            find_projects(patterns)
+
+
+def test_run_batch(tmp_path, monkeypatch):
+    make_projects(tmp_path, monkeypatch, ["a", "b"])
+    results = run_batch(find_projects(["specs/*"]), ["lint", "status"], workers=1)
+
+    assert [(result.project, result.ok, result.lints) for result in results] == [
+        ("specs/a", True, 11),
+        ("specs/b", True, 11),
+    ]
+
+    out_dir = tmp_path / "wreqs-results"
+    summary = json.loads((out_dir / "summary.json").read_text(encoding="utf8"))
+    assert [result["project"] for result in summary] == ["specs/a", "specs/b"]
+
+    # Both projects have the same documents, which were converted only once.
+    update = (out_dir / "specs/b/update.txt").read_text(encoding="utf8")
+    assert "Reused shared conversion for sys" in update
+    assert len(list((tmp_path / ".wreqs-cache/md").iterdir())) == 2
+    assert (tmp_path / "specs/b/tmp/sys.md").exists()
+
+    lint = (out_dir / "specs/a/lint.txt").read_text(encoding="utf8")
+    assert lint.startswith("sys:MalformedReqID [bad-4]")
+    assert "sys " in (out_dir / "specs/a/status.txt").read_text(encoding="utf8")
+
+
+def test_run_batch_reports_broken_project(tmp_path, monkeypatch):
+    make_projects(tmp_path, monkeypatch, ["a", "b"])
+    (tmp_path / "specs/a/sys.md").unlink()
+
+    results = run_batch(find_projects(["specs/*"]), ["lint"], workers=1)
+    assert [result.ok for result in results] == [False, True]
+    assert "sys.md" in results[0].error
+    assert (tmp_path / "wreqs-results/specs/a/error.txt").exists()
+
+
+def test_run_batch_reparses_truncated_shared_spec(tmp_path, monkeypatch):
+    make_projects(tmp_path, monkeypatch, ["a", "b"])
+    run_batch(find_projects(["specs/a"]), ["lint"], workers=1)
+
+    # As if a run was interrupted while sharing them.
+    for path in (tmp_path / ".wreqs-cache/specs").iterdir():
+        path.write_bytes(path.read_bytes()[:len(path.read_bytes()) // 2])
+
+    results = run_batch(find_projects(["specs/*"]), ["lint"], workers=1)
+    assert [(result.ok, result.lints) for result in results] == [(True, 11), (True, 11)]
+    for path in (tmp_path / ".wreqs-cache/specs").iterdir():
+        marshal.loads(path.read_bytes())
@@ -0,0 +1,30 @@
+import tomllib
+from wordreqs2.config import ProjConfig
+from wordreqs2.load import ReqDB
+from wordreqs2.prepare import run_prepare
+from benchmarks.generate import ProjectShape, write_project
+from benchmarks.run import main
+
+
+def test_generated_project_loads(tmp_path, monkeypatch):
+    shape = ProjectShape(docs=3, reqs_per_doc=20, deleted_ratio=0.5)
+    write_project(tmp_path, shape)
+    monkeypatch.chdir(tmp_path)
+
+    config = ProjConfig.from_dict(tomllib.load(open("wreqs.toml", "rb")))
+    run_prepare(config.docs)
+    db = ReqDB(config)
+
+    assert db.reqs.groupby("doc_id", observed=True).size().tolist() == [20, 20, 20]
+    assert db.reqs.is_deleted.any()
+    assert set(db.traces.to_doc_id) == {"doc0"}
+    assert len(db.signals) > 0
+
+
+def test_benchmark_reports_every_stage(tmp_path):
+    results = main(["--scales", "5", "--docs", "2", "--out", str(tmp_path / "out.json")])
+
+    stages = results["scales"][0]["stages"]
+    assert "parse" in stages and "status" in stages and "status_summaries_warm" in stages
+    assert all(stage["seconds"] >= 0 and stage["peak_bytes"] > 0
+               for stage in stages.values())
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+HEAVY_MODULES = ["pandas", "numpy"]
+
+CHECK_MODULES = """
+import sys
+from wordreqs2 import run_cli
+sys.argv = ["wreqs"] + sys.argv[1:]
+run_cli()
+print([name for name in {modules!r} if name in sys.modules])
+"""
+
+
+def run_wreqs(cwd, *args) -> str:
+    env = dict(os.environ, PYTHONPATH=str(Path.cwd()), PYTHONIOENCODING="utf8")
+    script = CHECK_MODULES.format(modules=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", script, *args], cwd=cwd, env=env,
+                            capture_output=True, text=True, encoding="utf8", check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_update_and_status_skip_pandas(md_project_dir):
+    assert run_wreqs(md_project_dir, "update") == "[]"
+    assert run_wreqs(md_project_dir, "status", "-su") == "[]"
+    assert run_wreqs(md_project_dir, "query", "-su", "req", "sys1") == "[]"
+    assert run_wreqs(md_project_dir, "search", "-su", "power") == "[]"
+    assert run_wreqs(md_project_dir, "lint", "-su") == str(HEAVY_MODULES)
@@ -19,3 +19,14 @@ def test_load_minimal():
 
     pc = ProjConfig.from_dict(config)
     assert len(pc.docs) == 2
+
+
+def test_load_workers():
+    assert ProjConfig.from_dict({}).workers is None
+    assert ProjConfig.from_dict({"workers": 2}).workers == 2
+
+
+def test_load_near_duplicate_threshold():
+    assert ProjConfig.from_dict({}).near_duplicate_threshold == 0.8
+    config = {"lint": {"near_duplicate_threshold": 0.9}}
+    assert ProjConfig.from_dict(config).near_duplicate_threshold == 0.9
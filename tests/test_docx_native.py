@@ -0,0 +1,29 @@
+import shutil
+import pytest
+from wordreqs2 import docx_to_md, md_spec
+from wordreqs2.docx_to_md import word_bytes_to_md
+from wordreqs2.docx_native import word_bytes_to_md_native
+
+
+@pytest.mark.skipif(shutil.which("pandoc") is None, reason="pandoc not installed")
+def test_native_matches_pandoc():
+    with open("tests/examples/sys.docx", "rb") as f:
+        word = f.read()
+
+    pandoc_spec = md_spec.parse_lines(word_bytes_to_md(word).splitlines(keepends=True))
+    native_spec = md_spec.parse_lines(word_bytes_to_md_native(word).splitlines(keepends=True))
+
+    assert [req.id for req in native_spec.reqs] == ["sys1", "sys2"]
+    assert native_spec.reqs == pandoc_spec.reqs
+
+
+@pytest.mark.skipif(shutil.which("pandoc") is None, reason="pandoc not installed")
+def test_old_pandoc_converts_through_file(monkeypatch):
+    with open("tests/examples/sys.docx", "rb") as f:
+        word = f.read()
+    md = word_bytes_to_md(word)
+
+    monkeypatch.setattr(docx_to_md, "pandoc_version", lambda: "pandoc 2.14.2")
+    assert not docx_to_md.pandoc_reads_stdin()
+    assert word_bytes_to_md(word) == md
+
@@ -0,0 +1,35 @@
+import json
+import pandas as pd
+import pytest
+from wordreqs2.load import ReqDB
+from wordreqs2.export import run_export
+
+
+def test_export_in_chunks(md_project, tmp_path, monkeypatch):
+    db, config = ReqDB(md_project), md_project
+    monkeypatch.setattr("wordreqs2.export.CHUNK_ROWS", 2)
+
+    run_export(db, config, "out", "csv")
+    run_export(db, config, "out", "jsonl", docs_filter=["mod"])
+
+    reqs = pd.read_csv("out/reqs.csv")
+    assert reqs.req_id.tolist() == db.reqs.req_id.tolist()
+    assert reqs.contents.tolist() == db.reqs.contents.tolist()
+
+    lines = (tmp_path / "out/signals.jsonl").read_text(encoding="utf8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == (db.signals.doc_id == "mod").sum()
+    assert {record["doc_id"] for record in records} == {"mod"}
+    assert (tmp_path / "out/lints.csv").exists()
+
+
+def test_export_parquet(md_project, monkeypatch):
+    pytest.importorskip("pyarrow")
+    db, config = ReqDB(md_project), md_project
+    monkeypatch.setattr("wordreqs2.export.CHUNK_ROWS", 2)
+
+    run_export(db, config, "out", "parquet")
+
+    traces = pd.read_parquet("out/traces.parquet")
+    pd.testing.assert_frame_equal(traces, db.traces, check_dtype=False,
+                                  check_categorical=False)
@@ -1,8 +1,12 @@
+import json
 import tomllib
+import pandas as pd
 from wordreqs2.config import ProjConfig
 from wordreqs2.load import ReqDB
 from wordreqs2.prepare import run_prepare, copy_docs
-from wordreqs2.lint import check_lints, NoShallOrMay
+from wordreqs2.lint import (check_lints, build_lint_table, lints_from_table, run_lint,
+                            LintDeps, NoShallOrMay, NearDuplicate, DuplicateID, UnsetSignal,
+                            UnusedSignal)
 
 
 def build_req_db(config_file) -> tuple[ReqDB, ProjConfig]:
@@ -17,4 +21,105 @@ def test_lint_no_shall_or_may():
     lints = [lint for lint in check_lints(db, config) if isinstance(lint, NoShallOrMay)]
     assert len(lints) == 1
     assert lints[0].req_id == "sys1"
-    
\ No newline at end of file
+    
+
+def test_lint_table(md_project):
+    db, config = ReqDB(md_project), md_project
+    table = build_lint_table(db, config)
+    found = set(zip(table.lint_type, table.doc_id, table.req_id))
+
+    assert found == {
+        ("MalformedReqID", "sys", "bad-4"),
+        ("MalformedReqID", "mod", "sys1"),
+        ("DuplicateID", "sys", "sys1"),
+        ("DuplicateID", "mod", "sys1"),
+        ("NoShallOrMay", "sys", "bad-4"),
+        ("UncapitalizedBool", "sys", "sys1"),
+        ("UncapitalizedBool", "mod", "mod2"),
+        ("TracedReqNotFound", "mod", "mod1"),
+        ("UnsetSignal", "sys", "sys2"),
+        ("UnsetSignal", "mod", "mod2"),
+        ("UnusedSignal", "mod", "mod1"),
+    }
+    lints = lints_from_table(table[table.lint_type == "TracedReqNotFound"])
+    assert lints[0].parent_req_id == "sys9"
+
+
+def test_lint_cache_matches_full_run(md_project, tmp_path):
+    db, config = ReqDB(md_project), md_project
+    build_lint_table(db, config)
+
+    md = (tmp_path / "tmp/mod.md").read_text(encoding="utf8")
+    (tmp_path / "tmp/mod.md").write_text(md.replace("Orphan", "Mode"), encoding="utf8")
+    db = ReqDB(config)
+
+    cached = build_lint_table(db, config)
+    full = build_lint_table(db, config, use_cache=False)
+    pd.testing.assert_frame_equal(cached.astype(object), full.astype(object))
+    assert "UnusedSignal" not in set(cached.lint_type)
+
+
+def test_lint_near_duplicate():
+    text = "The system shall set the Power output to on when the Mode input is active."
+    reqs = pd.DataFrame({
+        "doc_id": ["sys", "sys", "mod", "mod"],
+        "req_id": ["sys1", "sys2", "mod1", "mod2"],
+        "contents": [text, "The system shall report faults.", text.replace("active", "on"), text],
+        "is_deleted": [False, False, False, True],
+    })
+    table = NearDuplicate.check(reqs, 0.7)
+    assert list(zip(table.req_id, table.to_req_id)) == [("sys1", "mod1"), ("mod1", "sys1")]
+    assert lints_from_table(table)[0].msg.endswith('"mod1" in mod')
+
+
+def test_run_lint_plain(md_project, capsys):
+    db, config = ReqDB(md_project), md_project
+    capsys.readouterr()
+    run_lint(db, config, fmt="plain", max_lints=2)
+    out = capsys.readouterr().out.splitlines()
+
+    assert out[:3] == [
+        "sys:MalformedReqID [bad-4] Nothing here.",
+        "mod:MalformedReqID [sys1] Duplicate shall.",
+        "... 9 more lints not shown",
+    ]
+    # Documents in config order.
+    assert out[4].split() == ["Lint", "sys", "mod"]
+    assert out[-1].split() == ["All", "5", "6"]
+
+
+def test_run_lint_json(md_project, capsys):
+    db, config = ReqDB(md_project), md_project
+    capsys.readouterr()
+    run_lint(db, config, docs_filter=["mod"], fmt="json")
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert len(records) == 6
+    assert records[-1]["lint_type"] == "UnusedSignal"
+    assert records[-1]["signal"] == "Orphan"
+    assert records[-1]["msg"] == 'mod:UnusedSignal [mod1] Signal "Orphan" is never used'
+
+
+def test_lint_keys_ignore_unrelated_edits(md_project, tmp_path):
+    db, config = ReqDB(md_project), md_project
+    rules = [DuplicateID, UnsetSignal, UnusedSignal]
+
+    def sys_keys(db):
+        deps = LintDeps(db, config)
+        return [rule.cache_key("sys", config, deps) for rule in rules]
+
+    before = sys_keys(db)
+    md = (tmp_path / "tmp/mod.md").read_text(encoding="utf8")
+
+    # A new requirement in mod that shares nothing with sys.
+    (tmp_path / "tmp/mod.md").write_text(md + "\n\\[mod3\\]\n\nModule shall idle.\n",
+                                         encoding="utf8")
+    assert sys_keys(ReqDB(config)) == before
+
+    # mod now sets Mode, which sys reads.
+    (tmp_path / "tmp/mod.md").write_text(
+        md + "\n\\[mod3\\]\n\nModule shall set [Mode]{custom-style=\"ModSignal\"}.\n",
+        encoding="utf8")
+    after = sys_keys(ReqDB(config))
+    assert after[0] == before[0]
+    assert after[1] != before[1]
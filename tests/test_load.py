@@ -0,0 +1,59 @@
+import shutil
+import pandas as pd
+from wordreqs2 import load
+from wordreqs2.load import ReqDB
+from wordreqs2.prepare import run_prepare
+
+
+def test_update_docs_matches_rebuild(md_project, tmp_path):
+    db, config = ReqDB(md_project), md_project
+
+    md = (tmp_path / "sys.md").read_text(encoding="utf8")
+    (tmp_path / "sys.md").write_text(md + "\n\\[sys5\\]\n\nNew [Mode]{custom-style=\"ModSignal\"} shall.\n",
+                                     encoding="utf8")
+    run_prepare({"sys": config.docs["sys"]})
+    db.update_docs(config, ["sys"])
+    rebuilt = ReqDB(config)
+
+    for table in ["reqs", "traces", "signals"]:
+        pd.testing.assert_frame_equal(getattr(db, table), getattr(rebuilt, table),
+                                      check_dtype=False)
+    assert "sys5" in set(db.reqs.req_id)
+
+
+def test_table_dtypes(md_project):
+    db = ReqDB(md_project)
+
+    assert list(db.reqs.doc_id.cat.categories) == ["sys", "mod"]
+    assert db.reqs.is_deleted.dtype == bool
+    assert db.signals.modified.dtype == bool
+    assert isinstance(db.signals["name"].dtype, pd.CategoricalDtype)
+    assert db.reqs.is_deleted.sum() == 1
+
+    report = db.memory_report()
+    assert report.loc["reqs", "rows"] == len(db.reqs)
+    assert report.loc["signals", "bytes"] > 0
+
+
+def test_load_order_does_not_change_tables(md_project):
+    db, config = ReqDB(md_project), md_project
+    reordered = ReqDB(config, reversed(list(config.docs)))
+
+    for table in ["reqs", "traces", "signals"]:
+        pd.testing.assert_frame_equal(getattr(db, table), getattr(reordered, table))
+
+
+def test_parallel_load_matches_serial(md_project, tmp_path, monkeypatch):
+    db, config = ReqDB(md_project), md_project
+    shutil.rmtree(tmp_path / "tmp")
+    run_prepare(config.docs)
+
+    # Send every document to the workers, parsing them from scratch there.
+    monkeypatch.setattr(load, "PARALLEL_MIN_BYTES", 0)
+    config.workers = 2
+    parallel = ReqDB(config)
+
+    for table in ["reqs", "traces", "signals"]:
+        pd.testing.assert_frame_equal(getattr(parallel, table), getattr(db, table))
+    assert parallel.fingerprints == db.fingerprints
+    assert (tmp_path / "tmp/sys.spec").exists()
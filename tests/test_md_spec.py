@@ -0,0 +1,52 @@
+import pytest
+from wordreqs2 import md_spec
+from wordreqs2.md_spec import Spec, Heading, Req
+
+
+EXAMPLE = """# Power
+
+\\[sys1\\]
+
+The [Power On]{custom-style="Signal"} input shall set [Ready]{custom-style="ModSignal"}.
+
+\\[sys2 → par1, par2\\]
+
+The system shall be blue.
+"""
+
+
+def test_spec_record_round_trip():
+    # Metadata lines not written the usual way are kept as they are.
+    md = EXAMPLE + "\n\\[sys3→par1\\]\n\nLast."
+    spec = md_spec.parse_lines(md.splitlines(keepends=True))
+    record = spec.to_record()
+    loaded = Spec.from_record(record)
+
+    assert list(record["metadata"]) == [2]
+
+    assert isinstance(loaded.blocks[0], Heading)
+    assert loaded.blocks[0].content == "Power"
+    assert loaded.reqs == spec.reqs
+    assert loaded.get_req("sys2").req_trace_ids == ["par1", "par2"]
+    assert loaded.signals == {"Power On"}
+    assert loaded.mod_signals == {"Ready"}
+
+
+def test_iter_blocks_streams_lines():
+    lines = EXAMPLE.splitlines(keepends=True)
+    blocks = md_spec.iter_blocks(iter(lines))
+
+    assert isinstance(next(blocks), Heading)
+    assert next(blocks).id == "sys1"
+    assert [req.id for req in blocks] == ["sys2"]
+    assert len(lines) == len(EXAMPLE.splitlines())
+
+
+def test_get_req_index():
+    spec = md_spec.parse_lines((EXAMPLE + "\n\\[sys2\\]\n\nAgain.\n").splitlines(keepends=True))
+
+    assert spec.get_req("sys1").signals == {"Power On"}
+    with pytest.raises(IndexError, match="More than 1"):
+        spec.get_req("sys2")
+    with pytest.raises(IndexError, match="No req"):
+        spec.get_req("sys3")
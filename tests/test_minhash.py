@@ -0,0 +1,31 @@
+from wordreqs2.minhash import band_rows, near_duplicate_pairs, NUM_PERM
+
+
+BASE = "The system shall set the Power output to on when the Mode input is active."
+
+
+def test_near_duplicate_pairs():
+    texts = [
+        BASE,
+        "The module shall report the status of the Ext input every second.",
+        BASE.replace("active", "enabled"),
+        "Deleted.",
+        "",
+        "The system shall set the [Power]{custom-style=\"Signal\"} output to on when the Mode input is active.",
+    ]
+    pairs = near_duplicate_pairs(texts, 0.7).tolist()
+    assert pairs == [[0, 2], [0, 5], [2, 5]]
+    assert near_duplicate_pairs(texts, 1.0).tolist() == [[0, 5]]
+
+
+def test_near_duplicate_pairs_large_bucket():
+    texts = [BASE] * 50 + ["The module shall report the status every second."]
+    pairs = near_duplicate_pairs(texts, 0.9)
+    assert len(pairs) >= 49
+    assert 50 not in pairs
+
+
+def test_band_rows():
+    rows = [band_rows(threshold) for threshold in [0.5, 0.8, 0.95]]
+    assert rows == sorted(rows)
+    assert all(1 <= r <= NUM_PERM for r in rows)
@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+from wordreqs2 import prepare
+from wordreqs2.config import DocConfig
+from wordreqs2.prepare import Manifest, copy_docs, iter_prepare, run_prepare, transform_key
+
+
+def test_prepare_skips_unchanged(tmp_path, monkeypatch):
+    shutil.copy("tests/examples/sys.docx", tmp_path / "sys.docx")
+    monkeypatch.chdir(tmp_path)
+
+    doc_configs = {
+        "sys": DocConfig("sys", "sys.docx", ["docx-to-md"], "sys"),
+        "copy": DocConfig("copy", "sys.docx", ["docx-to-md"], "sys"),
+    }
+    run_prepare(doc_configs)
+
+    manifest = Manifest.load()
+    key = transform_key("sys.docx", ["docx-to-md"])
+    assert manifest.is_current("sys", key)
+    assert manifest.is_current("copy", key)
+    assert (tmp_path / "tmp/sys.md").read_bytes() == (tmp_path / "tmp/copy.md").read_bytes()
+
+    (tmp_path / "tmp/copy.md").write_text("edited")
+    assert not Manifest.load().is_current("copy", key)
+
+
+def test_iter_prepare_yields_each_doc_once(tmp_path, monkeypatch):
+    shutil.copy("tests/examples/sys.docx", tmp_path / "sys.docx")
+    (tmp_path / "other.md").write_text("\\[o1\\]\n\nText.\n")
+    monkeypatch.chdir(tmp_path)
+
+    doc_configs = {
+        "sys": DocConfig("sys", "sys.docx", ["docx-to-md"], "sys"),
+        "copy": DocConfig("copy", "sys.docx", ["docx-to-md"], "sys"),
+        "other": DocConfig("other", "other.md", [], "o"),
+    }
+    assert sorted(iter_prepare(doc_configs, workers=2)) == ["copy", "other", "sys"]
+
+    (tmp_path / "tmp/copy.md").write_text("edited")
+    assert list(iter_prepare(doc_configs)) == ["sys", "other", "copy"]
+
+
+def test_copy_docs_skips_unchanged(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "share").mkdir()
+    (tmp_path / "share/a.md").write_text("a1")
+    (tmp_path / "share/b.md").write_text("b1")
+    doc_configs = {
+        doc_id: DocConfig(doc_id, f"{doc_id}.md", [], doc_id, import_from=f"share/{doc_id}.md")
+        for doc_id in ["a", "b"]
+    }
+
+    copy_docs(doc_configs)
+    assert (tmp_path / "a.md").read_text() == "a1"
+    assert capsys.readouterr().out.count("Imported") == 2
+
+    copy_docs(doc_configs)
+    assert "Imported" not in capsys.readouterr().out
+
+    # Same size and a new mtime is settled by comparing contents.
+    (tmp_path / "share/a.md").write_text("a2")
+    os.utime(tmp_path / "share/b.md", ns=(0, 10**9))
+    copy_docs(doc_configs)
+    assert capsys.readouterr().out.strip().splitlines() == ["🚚 Imported a to project"]
+    assert (tmp_path / "a.md").read_text() == "a2"
+    assert os.stat(tmp_path / "b.md").st_mtime_ns == 10**9
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.md", "b.md", "share"]
+
+
+def test_copy_docs_reports_failed_copy(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.md").write_text("a1")
+    doc_configs = {"b": DocConfig("b", "b.md", [], "b", import_from="a.md")}
+
+    # As when the xcopy fallback on Windows fails.
+    def fail(src, dst):
+        raise subprocess.CalledProcessError(4, "xcopy")
+
+    monkeypatch.setattr(prepare, "copy_file", fail)
+    copy_docs(doc_configs)
+    assert capsys.readouterr().out.startswith("❌ Could not import b:")
@@ -0,0 +1,36 @@
+from wordreqs2.profiling import Profiler
+
+
+def test_nested_spans():
+    profiler = Profiler()
+    profiler.start(memory=True)
+    with profiler.span("load"):
+        with profiler.span("parse"):
+            data = [0] * 100_000
+        del data
+        profiler.add("worker", 1.5)
+    with profiler.span("lint"):
+        pass
+    profiler.stop()
+
+    names = [(span.depth, span.name) for span in profiler.spans()]
+    assert names == [(0, "total"), (1, "load"), (2, "parse"), (2, "worker"), (1, "lint")]
+
+    load = profiler.root.children[0]
+    parse = load.children[0]
+    assert parse.peak_bytes >= 800_000
+    assert load.peak_bytes >= parse.peak_bytes
+    assert profiler.root.peak_bytes >= load.peak_bytes
+    assert load.seconds >= parse.seconds
+    assert not profiler.enabled
+
+
+def test_memory_is_opt_in():
+    profiler = Profiler()
+    profiler.start()
+    with profiler.span("load"):
+        data = [0] * 100_000
+    del data
+    profiler.stop()
+
+    assert profiler.root.children[0].peak_bytes == 0
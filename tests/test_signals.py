@@ -0,0 +1,26 @@
+import pandas as pd
+from wordreqs2.signals import SignalIndex, is_external_signal
+
+
+SIGNALS = pd.DataFrame({
+    "name": pd.Categorical(["Power", "Power", "Mode", "Ext"]),
+    "modified": [True, False, False, False],
+    "doc_id": ["sys", "mod", "mod", "mod"],
+    "req_id": ["sys1", "mod1", "mod1", "mod2"],
+})
+
+
+def test_signal_index():
+    index = SignalIndex(SIGNALS)
+
+    assert index.set_names == {"Power"}
+    assert index.read_names == {"Power", "Mode", "Ext"}
+    assert index.names() == ["Ext", "Mode", "Power"]
+    assert index.setters("Power") == {"sys": ["sys1"]}
+    assert index.readers("Mode") == {"mod": ["mod1"]}
+    assert index.setters("Missing") == {}
+
+
+def test_is_external_signal():
+    mask = is_external_signal(SIGNALS, {"sys": [], "mod": ["Ext", "Power"]})
+    assert mask.tolist() == [False, True, False, True]
@@ -0,0 +1,35 @@
+from wordreqs2.load import ReqDB
+from wordreqs2 import spec_cache
+from wordreqs2.spec_cache import DocSummary, get_summary, summary_filename
+from wordreqs2.status import run_status, run_status_from_summaries
+
+
+def test_summaries_match_db(md_project, capsys):
+    config = md_project
+
+    db = ReqDB(config)
+    assert summary_filename("sys").exists()
+    assert get_summary(config.docs["sys"]) == DocSummary(count=4, deleted=1, max_num=3,
+                                                          malformed=1)
+
+    capsys.readouterr()
+    run_status(db, config)
+    from_db = capsys.readouterr().out
+    run_status_from_summaries(config)
+    assert capsys.readouterr().out == from_db
+    assert "sys4" in from_db
+
+    # A config change makes the summary stale even though the spec is not.
+    config.docs["sys"].req_id_prefix = "bad-"
+    assert get_summary(config.docs["sys"]).max_num == 4
+
+
+def test_summary_skips_hash_when_unchanged(md_project, monkeypatch):
+    config = md_project
+    ReqDB(config)
+
+    def fail(path):
+        raise AssertionError(f"hashed {path}")
+
+    monkeypatch.setattr(spec_cache, "file_digest", fail)
+    assert get_summary(config.docs["sys"]).count == 4
@@ -0,0 +1,74 @@
+from wordreqs2 import store as store_module
+from wordreqs2.store import ReqStore
+
+
+def test_store_queries(md_project, tmp_path):
+    config = md_project
+
+    store = ReqStore()
+    assert store.sync(config) == ["sys", "mod"]
+    assert store.sync(config) == []
+
+    assert [(r["doc_id"], r["req_id"]) for r in store.children("sys1")] == [("mod", "mod1")]
+    assert [r["req_id"] for r in store.parents("mod1")] == ["sys1"]
+    # sys1 is also a duplicate ID in mod.
+    assert [r["doc_id"] for r in store.req("sys1")] == ["sys", "mod"]
+    assert [r["doc_id"] for r in store.req("sys1", ["mod"])] == ["mod"]
+    assert [r["req_id"] for r in store.children("sys1", ["mod"])] == ["mod1"]
+    assert store.children("sys1", ["sys"]) == []
+    assert store.parents("mod1", ["mod"]) == []
+    assert [r["req_id"] for r in store.readers("Mode", ["mod", "sys"])] == ["sys2", "mod2"]
+    assert [r["req_id"] for r in store.setters("Power")] == ["sys1"]
+    assert sorted(r["req_id"] for r in store.readers("Mode")) == ["mod2", "sys2"]
+
+    (tmp_path / "tmp/mod.md").write_text("\\[mod7 → sys2\\]\n\nNew shall.\n", encoding="utf8")
+    assert store.sync(config) == ["mod"]
+    assert [r["req_id"] for r in store.children("sys2")] == ["mod7"]
+    assert store.req("mod1") == []
+    store.close()
+
+
+def test_store_search(md_project, tmp_path):
+    config = md_project
+
+    store = ReqStore()
+    store.sync(config)
+
+    def search(*terms):
+        return [(r["doc_id"], r["req_id"]) for r in store.search(list(terms))]
+
+    assert search("shall", "set") == [("sys", "sys1"), ("mod", "mod1")]
+    assert search("shall set power") == [("sys", "sys1")]
+    assert search("mod*") == [("sys", "sys2"), ("mod", "mod1"), ("mod", "mod2")]
+    # Style names are markup, not text.
+    assert search("ModSignal") == []
+    assert [(r["doc_id"], r["req_id"]) for r in store.search(["shall"], ["mod"])] == \
+        [("mod", "mod1"), ("mod", "sys1")]
+
+    (tmp_path / "tmp/mod.md").write_text("\\[mod7\\]\n\nNew power shall.\n", encoding="utf8")
+    store.sync(config)
+    assert search("power") == [("sys", "sys1"), ("sys", "sys2"), ("mod", "mod7")]
+    # VACUUM keeps the ids reqs_text refers to.
+    store.conn.execute("VACUUM")
+    assert search("power") == [("sys", "sys1"), ("sys", "sys2"), ("mod", "mod7")]
+    store.close()
+
+
+def test_store_without_fts5(md_project, tmp_path, monkeypatch):
+    config = md_project
+
+    # As with a SQLite built without FTS5.
+    monkeypatch.setattr(store_module, "TEXT_SCHEMA",
+                        "CREATE VIRTUAL TABLE reqs_text USING no_fts5 (text)")
+    store = ReqStore()
+    store.sync(config)
+    assert not store.has_text
+    assert [r["req_id"] for r in store.parents("mod1")] == ["sys1"]
+    store.close()
+
+    # The index is built from the stored requirements once FTS5 is there.
+    monkeypatch.undo()
+    monkeypatch.chdir(tmp_path)
+    store = ReqStore()
+    assert [r["req_id"] for r in store.search(["power"])] == ["sys1", "sys2"]
+    store.close()
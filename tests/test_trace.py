@@ -0,0 +1,43 @@
+import pandas as pd
+from wordreqs2.config import ProjConfig
+from wordreqs2.trace import TraceGraph, trace_levels
+
+
+def doc(prefix, parent=None):
+    return {"file": f"{prefix}.md", "transforms": [], "req_id_prefix": prefix,
+            "parent": parent}
+
+
+CONFIG = ProjConfig.from_dict({
+    "docs": {"sys": doc("sys"), "mod": doc("mod", "sys"), "unit": doc("unit", "mod")},
+    "traces": {
+        "sys-down": {"direction": "down", "from": "sys", "to": ["mod"], "levels": 2},
+        "unit-up": {"direction": "up", "from": "unit", "to": ["mod"], "levels": 3},
+    },
+})
+
+REQS = pd.DataFrame({
+    "doc_id": ["sys", "sys", "sys", "mod", "mod", "unit"],
+    "req_id": ["sys1", "sys2", "sys3", "mod1", "mod2", "unit1"],
+})
+
+TRACES = pd.DataFrame({
+    "doc_id": ["mod", "mod", "mod", "unit", "unit"],
+    "req_id": ["mod1", "mod2", "mod2", "unit1", "unit1"],
+    "to_doc_id": ["sys", "sys", "sys", "mod", "mod"],
+    "to_req_id": ["sys1", "sys1", "sys2", "mod1", "mod9"],
+})
+
+
+def test_trace_levels():
+    assert trace_levels(CONFIG, CONFIG.traces["sys-down"]) == [["mod"], ["unit"]]
+    assert trace_levels(CONFIG, CONFIG.traces["unit-up"]) == [["mod"], ["sys"]]
+
+
+def test_trace_graph():
+    graph = TraceGraph(REQS, TRACES)
+
+    assert graph.link_counts("sys", "down") == {"mod": 3, "(untraced)": 1}
+    assert graph.link_counts("unit", "up") == {"mod": 1}
+    assert graph.coverage("sys", "down", [["mod"], ["unit"]]) == [2, 1]
+    assert graph.coverage("unit", "up", [["mod"], ["sys"]]) == [1, 1]
@@ -0,0 +1,19 @@
+import pytest
+from wordreqs2.transforms import TRANSFORMS, apply_transforms, register_transform
+
+
+def test_chain_passes_text_in_memory():
+    timings = []
+    md = apply_transforms(b"\\[sys1\\] The system shall run.\r\n", ["newline-after-meta"],
+                          lambda name, seconds: timings.append(name))
+    assert md == "\\[sys1\\]\nThe system shall run.\n"
+    assert timings == ["newline-after-meta"]
+
+
+def test_registered_transform(monkeypatch):
+    monkeypatch.setattr("wordreqs2.transforms.TRANSFORMS", dict(TRANSFORMS))
+    register_transform("upper")(lambda content: content.upper())
+
+    assert apply_transforms("a", ["upper"], lambda *_: None) == "A"
+    with pytest.raises(ValueError, match="Unknown transform"):
+        apply_transforms("a", ["lower"], lambda *_: None)
@@ -0,0 +1,256 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass, asdict
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Optional
+
+from wordreqs2.config import load_config
+from .cli import LINT_FORMATS
+from .prepare import (conversion_jobs, copy_docs, iter_prepare, run_transforms_job,
+                      source_size, worker_count)
+from .profiling import span
+from .shared_cache import SHARED_CACHE
+
+# Action modules are imported where they are used, as in cli.
+
+
+BATCH_ACTIONS = ["lint", "trace", "status"]
+CONFIG_FILENAME = "wreqs.toml"
+
+
+@dataclass
+class ProjectResult:
+    project: str
+    ok: bool = True
+    error: Optional[str] = None
+    seconds: float = 0.0
+    lints: Optional[int] = None
+
+
+def find_projects(patterns: list[str]) -> list[Path]:
+    """Project folders matching patterns, which may be folders, wreqs.toml
+    files or globs of either, e.g. specs/**/wreqs.toml.
+
+    Raises ValueError if a pattern matches no project, e.g. from a typo.
+    """
+    projects = []
+    unmatched = []
+    for pattern in patterns:
+        found = False
+        for match in sorted(glob.glob(pattern, recursive=True)) or [pattern]:
+            path = Path(match)
+            if path.name == CONFIG_FILENAME:
+                path = path.parent
+            if not (path / CONFIG_FILENAME).is_file():
+                continue
+            found = True
+            if path.resolve() not in [project.resolve() for project in projects]:
+                projects.append(path)
+        if not found:
+            unmatched.append(pattern)
+
+    if unmatched:
+        raise ValueError(f"No {CONFIG_FILENAME} found for {', '.join(unmatched)}")
+    return projects
+
+
+def project_name(path: Path) -> str:
+    try:
+        return path.resolve().relative_to(Path.cwd()).as_posix()
+    except ValueError:
+        return path.resolve().name
+
+
+@contextmanager
+def project_dir(path: Path):
+    # Projects use paths relative to their own folder, as when wreqs runs there.
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old)
+
+
+def warm_job(args: tuple) -> Optional[str]:
+    try:
+        run_transforms_job(args)
+    except Exception as e:
+        # The project converts it again itself, and reports the error then.
+        return f"❌ Could not convert {args[0]}: {e}"
+    return None
+
+
+def warm_conversions(projects: list[Path], pool):
+    """Convert every out of date document of every project into the shared
+    cache, so the projects then only copy their conversions.
+
+    Documents with the same source contents and transforms are converted
+    once, however many projects use them.
+    """
+    jobs = {}
+    for path in projects:
+        try:
+            with project_dir(path):
+                config = load_config()
+                copy_docs(config.docs, config.workers)
+                for key, (doc_id, filename, transforms) in conversion_jobs(config.docs).items():
+                    if not SHARED_CACHE.has_conversion(key):
+                        jobs.setdefault(key, (f"{project_name(path)}:{doc_id}", filename,
+                                              transforms))
+        except Exception:
+            # Reported when the project runs.
+            continue
+
+    args = sorted(((label, filename, transforms, str(SHARED_CACHE.conversion_path(key)))
+                   for key, (label, filename, transforms) in jobs.items()),
+                  key=lambda job: source_size(job[1]), reverse=True)
+
+    for error in pool.imap_unordered(warm_job, args):
+        if error is not None:
+            print(error)
+
+
+def run_project(path: Path, actions: list[str], pool, out_dir: Path,
+                fmt: str = "plain", skip_update=False) -> ProjectResult:
+    """Update and load the project at path once, and write the output of each
+    action to out_dir/<action>.txt."""
+    from .load import ReqDB
+
+    result = ProjectResult(project_name(path))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    try:
+        with project_dir(path):
+            config = load_config()
+
+            with open(out_dir / "update.txt", "w", encoding="utf8") as f, redirect_stdout(f):
+                ready = None
+                if not skip_update:
+                    copy_docs(config.docs, config.workers)
+                    ready = iter_prepare(config.docs, config.workers, pool=pool)
+                if actions:
+                    db = ReqDB(config, ready, pool=pool)
+                elif ready is not None:
+                    for _ in ready:
+                        pass
+
+            for action in actions:
+                extension = "jsonl" if action == "lint" and fmt == "json" else "txt"
+                with open(out_dir / f"{action}.{extension}", "w", encoding="utf8") as f, \
+                        redirect_stdout(f):
+                    if action == "lint":
+                        from .lint import run_lint
+                        result.lints = run_lint(db, config, fmt=fmt)
+                    elif action == "trace":
+                        from .trace import run_traces
+                        run_traces(db, config)
+                    elif action == "status":
+                        from .status import run_status
+                        run_status(db, config)
+    except Exception as e:
+        result.ok = False
+        result.error = f"{type(e).__name__}: {e}"
+        (out_dir / "error.txt").write_text(traceback.format_exc(), encoding="utf8")
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def print_results(results: list[ProjectResult]):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Projects")
+    table.add_column("Project")
+    table.add_column("Lints", justify="right")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Result")
+
+    for result in results:
+        table.add_row(result.project,
+                      "" if result.lints is None else str(result.lints),
+                      f"{result.seconds:.1f}",
+                      "ok" if result.ok else result.error)
+
+    Console(highlight=False).print(table)
+
+
+def run_batch(projects: list[Path], actions: list[str], out_dir="wreqs-results",
+              cache_dir=".wreqs-cache", workers: Optional[int] = None,
+              fmt: str = "plain", skip_update=False) -> list[ProjectResult]:
+    """Run actions on each project in this process, with one worker pool and
+    a cache of conversions and parsed specs shared by all of them.
+
+    Each project's output goes to out_dir/<project>/, and a summary of all
+    of them to out_dir/summary.json.
+    """
+    out_dir = Path(out_dir).resolve()
+    SHARED_CACHE.enable(cache_dir)
+    pool = Pool(worker_count(workers))
+
+    results = []
+    try:
+        if not skip_update:
+            with span("warm conversions"):
+                warm_conversions(projects, pool)
+
+        for path in projects:
+            with span(f"project {project_name(path)}"):
+                result = run_project(path, actions, pool, out_dir / project_name(path),
+                                     fmt, skip_update)
+            results.append(result)
+            if result.ok:
+                print(f"✅ {result.project} in {result.seconds:.1f} s")
+            else:
+                print(f"❌ {result.project}: {result.error}")
+    finally:
+        pool.terminate()
+        pool.join()
+        SHARED_CACHE.disable()
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / "summary.json", "w", encoding="utf8") as f:
+        json.dump([asdict(result) for result in results], f, indent=2)
+
+    return results
+
+
+def run_batch_cli():
+    parser = argparse.ArgumentParser(
+        description="Update and check many wreqs projects in one process.")
+    parser.add_argument("projects", nargs="+",
+                        help="project folders, wreqs.toml files or globs, e.g. 'specs/**/wreqs.toml'")
+    parser.add_argument("--actions", nargs="*", default=BATCH_ACTIONS, choices=BATCH_ACTIONS,
+                        help="actions to run on each project after updating it")
+    parser.add_argument("-su", "--skip-update", action="store_true",
+                        help="skip update before actions")
+    parser.add_argument("--out-dir", default="wreqs-results",
+                        help="folder each project's results are written to")
+    parser.add_argument("--cache-dir", default=".wreqs-cache",
+                        help="folder for conversions and specs shared between projects")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes shared by all projects, default one per CPU")
+    parser.add_argument("--format", choices=LINT_FORMATS, default="plain",
+                        help="lint output format")
+    args = parser.parse_args()
+
+    try:
+        projects = find_projects(args.projects)
+    except ValueError as e:
+        parser.error(str(e))
+    results = run_batch(projects, args.actions, args.out_dir, args.cache_dir,
+                        args.workers, args.format, args.skip_update)
+    print()
+    print_results(results)
+
+    if not all(result.ok for result in results):
+        sys.exit(1)
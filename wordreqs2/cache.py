@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+
+
+TMP_DIR = Path("tmp")
+
+
+def bytes_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def key_digest(*parts) -> str:
+    """Digest of JSON-serializable parts, used to build cache keys."""
+    return bytes_digest(json.dumps(parts, sort_keys=True).encode("utf8"))
+
+
+def read_json(path, default: Any = None) -> Any:
+    try:
+        with open(path, encoding="utf8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def write_json(path, data: Any):
+    write_bytes(path, json.dumps(data, separators=(",", ":")).encode("utf8"))
+
+
+def temp_path(path: Path) -> Path:
+    # Written first and then renamed to path, so an interrupted run never
+    # leaves a truncated file behind.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def write_bytes(path, data: bytes):
+    path = Path(path)
+    tmp_path = temp_path(path)
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_copy(src, path):
+    """Copy src to path, replacing path only once the copy is complete."""
+    path = Path(path)
+    tmp_path = temp_path(path)
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, path)
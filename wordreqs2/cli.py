@@ -1,26 +1,91 @@
-import tomllib
-from pathlib import Path
 import argparse
+import cProfile
+from itertools import chain
 
-from wordreqs2.config import ProjConfig
-from .load import ReqDB
-from .prepare import run_prepare, copy_docs
-from .status import run_status
-from .lint import run_lint
-from .trace import run_traces
+from wordreqs2.config import ProjConfig, load_config
+from .profiling import PROFILER, span
+
+# Action modules are imported where they are used, since pandas takes most
+# of the startup time and update and status don't need it. So the choices
+# of their options are kept here rather than in them.
+
+LINT_FORMATS = ["rich", "plain", "json"]
+EXPORT_FORMATS = ["parquet", "arrow", "csv", "jsonl"]
 
 
 def run_cli():
     parser = argparse.ArgumentParser()
-    parser.add_argument("action", choices=["update", "trace", "lint", "status"])
+    parser.add_argument("action", choices=["update", "trace", "lint", "status", "watch", "query", "export",
+                                 "signals", "search"])
+    parser.add_argument("terms", nargs="*",
+                        help="query kind and argument, e.g. children sys-12, "
+                             "signal names for the signals action, or search terms")
     parser.add_argument("-su", "--skip-update", action="store_true",
                         help="skip update before actions")
     parser.add_argument("-d", "--documents", nargs="+")
-    args = parser.parse_args()
+    parser.add_argument("--watch-actions", nargs="+", default=["lint"],
+                        choices=["trace", "lint", "status"],
+                        help="outputs to reprint on each change in watch mode")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between checks for changes in watch mode")
+    parser.add_argument("--export-dir", default="export",
+                        help="folder the export action writes to")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS,
+                        help="export file format, default parquet if pyarrow is installed, else csv")
+    parser.add_argument("--format", choices=LINT_FORMATS, default="rich",
+                        help="lint output format, json writes one object per line")
+    parser.add_argument("--max-lints", type=int, metavar="N",
+                        help="print only the first N lints, the summary still counts all")
+    parser.add_argument("--pager", action="store_true",
+                        help="page lint output through $PAGER")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the time and peak memory of each stage")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="also trace the peak memory of each stage, which slows every stage down")
+    parser.add_argument("--profile-json", metavar="FILE",
+                        help="also write the stage breakdown to a JSON file")
+    parser.add_argument("--profile-cprofile", metavar="FILE",
+                        help="also write a cProfile dump, e.g. for snakeviz")
+    args = parser.parse_intermixed_args()
+
+    if args.terms and args.action not in ("query", "signals", "search"):
+        parser.error(f"unexpected arguments for {args.action}: {' '.join(args.terms)}")
+
+    config = load_config()
+
+    if not (args.profile or args.profile_memory or args.profile_json
+            or args.profile_cprofile):
+        run_action(args, config)
+        return
+
+    profile = cProfile.Profile() if args.profile_cprofile else None
+    PROFILER.start(memory=args.profile_memory)
+    if profile is not None:
+        profile.enable()
 
-    config_dict = tomllib.load(open("wreqs.toml", "rb"))
-    config = ProjConfig.from_dict(config_dict)    
+    try:
+        run_action(args, config)
+    finally:
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(args.profile_cprofile)
+        PROFILER.stop()
 
+    print()
+    PROFILER.print_table()
+    if args.profile_json:
+        PROFILER.write_json(args.profile_json)
+
+
+def run_action(args: argparse.Namespace, config: ProjConfig):
+    if args.action == "watch":
+        from .watch import run_watch
+        run_watch(config, args.watch_actions, docs_filter=args.documents,
+                  interval=args.interval)
+        return
+
+    ready = []
+    doc_configs = {}
     if args.action == "update" or not args.skip_update:
         if args.documents:
             doc_configs = {doc_id: doc_config
@@ -29,17 +94,56 @@ def run_cli():
         else:
             doc_configs = config.docs
 
-        copy_docs(doc_configs)
-        run_prepare(doc_configs)
+        from .prepare import copy_docs, iter_prepare
+        with span("copy"):
+            copy_docs(doc_configs, config.workers)
+
+        ready = iter_prepare(doc_configs, config.workers)
+        if args.action not in ("trace", "lint", "export", "signals"):
+            with span("prepare"):
+                ready = list(ready)
 
         if args.action == "update":
             return
 
-    db = ReqDB(config)
+    if args.action == "status":
+        from .status import run_status_from_summaries
+        with span("status"):
+            run_status_from_summaries(config, docs_filter=args.documents)
+        return
+
+    if args.action in ("query", "search"):
+        from .store import ReqStore
+        from .query import run_query, run_search
+        store = ReqStore()
+        with span("sync store"):
+            store.sync(config)
+        with span(args.action):
+            if args.action == "query":
+                run_query(store, args.terms, docs_filter=args.documents)
+            else:
+                run_search(store, config, args.terms, docs_filter=args.documents)
+        store.close()
+        return
+
+    from .load import ReqDB
+    # Each document is parsed as soon as its conversion finishes.
+    with span("prepare and load"):
+        db = ReqDB(config, chain(ready, (doc_id for doc_id in config.docs
+                                         if doc_id not in doc_configs)))
 
-    if args.action == "trace":
-        run_traces(db, config, docs_filter=args.documents)
-    elif args.action == "status":
-        run_status(db, config, docs_filter=args.documents)
-    elif args.action == "lint":
-        run_lint(db, config, docs_filter=args.documents)
+    with span(args.action):
+        if args.action == "trace":
+            from .trace import run_traces
+            run_traces(db, config, docs_filter=args.documents)
+        elif args.action == "lint":
+            from .lint import run_lint
+            run_lint(db, config, docs_filter=args.documents, fmt=args.format,
+                     max_lints=args.max_lints, pager=args.pager)
+        elif args.action == "signals":
+            from .signals import run_signals
+            run_signals(db.signal_index, config, args.terms, docs_filter=args.documents)
+        elif args.action == "export":
+            from .export import run_export
+            run_export(db, config, args.export_dir, args.export_format,
+                       docs_filter=args.documents)
@@ -1,3 +1,4 @@
+import tomllib
 from dataclasses import dataclass, field
 from typing import Optional, Self
 
@@ -22,12 +23,20 @@ class TraceConfig:
     direction: str
     from_: str
     to: list[str]
+    levels: int = 1
+
+
+# Estimated share of word triples two requirements must have in common to be
+# reported as near duplicates.
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = 0.8
 
 
 @dataclass
 class ProjConfig:
     docs: dict[str, DocConfig]
     traces: dict[str, TraceConfig]
+    workers: Optional[int] = None
+    near_duplicate_threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD
 
     @classmethod
     def from_dict(cls, config: dict) -> Self:
@@ -49,9 +58,18 @@ class ProjConfig:
             config["direction"],
             config["from"],
             config["to"],
+            levels=config.get("levels", 1),
         ) for trace_id, config in config.get("traces", {}).items()}
 
         return cls(
             docs=docs,
             traces=traces,
-        )
\ No newline at end of file
+            workers=config.get("workers", None),
+            near_duplicate_threshold=config.get("lint", {}).get(
+                "near_duplicate_threshold", DEFAULT_NEAR_DUPLICATE_THRESHOLD),
+        )
+
+
+def load_config(filename="wreqs.toml") -> ProjConfig:
+    with open(filename, "rb") as f:
+        return ProjConfig.from_dict(tomllib.load(f))
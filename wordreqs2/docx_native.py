@@ -0,0 +1,177 @@
+import io
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Iterator, Optional
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+HEADING_STYLE_PATTERN = re.compile(r'^heading (\d)$', re.IGNORECASE)
+
+# Characters pandoc escapes when writing markdown, so the output matches
+# what md_spec sees from the docx-to-md transform.
+ESCAPE_PATTERN = re.compile(r'([\\*`\[\]<>|$~^@])')
+INTRAWORD_UNDERSCORE_PATTERN = re.compile(r'(?<!\w)_|_(?!\w)')
+LINE_START_ESCAPES = [
+    (re.compile(r'^(#+)( |$)'), r'\\\1\2'),
+    (re.compile(r'^(\d+)([.)])( |$)'), r'\1\\\2\3'),
+    (re.compile(r'^([-+])( |$)'), r'\\\1\2'),
+]
+
+LINE_BREAK = '\\\n'
+
+# Pandoc reads its own code style as inline code rather than a custom style.
+VERBATIM_STYLE = 'Verbatim Char'
+
+
+def is_on(prop: ET.Element) -> bool:
+    return prop.get(f'{W}val', 'true') not in ('0', 'false', 'none')
+
+
+def escape(text: str) -> str:
+    text = ESCAPE_PATTERN.sub(r'\\\1', text)
+    return INTRAWORD_UNDERSCORE_PATTERN.sub(r'\\_', text)
+
+
+def escape_line_start(line: str) -> str:
+    for pattern, replacement in LINE_START_ESCAPES:
+        line = pattern.sub(replacement, line)
+    return line
+
+
+def read_style_names(docx: zipfile.ZipFile) -> tuple[dict, set]:
+    """Map style IDs to display names, and collect the default style IDs."""
+    try:
+        styles = ET.fromstring(docx.read('word/styles.xml'))
+    except KeyError:
+        return {}, set()
+
+    names = {}
+    defaults = set()
+    for style in styles.iter(f'{W}style'):
+        style_id = style.get(f'{W}styleId')
+        name = style.find(f'{W}name')
+        names[style_id] = name.get(f'{W}val') if name is not None else style_id
+        if style.get(f'{W}default') in ('1', 'true'):
+            defaults.add(style_id)
+
+    return names, defaults
+
+
+class Paragraph():
+    def __init__(self):
+        self.style = None
+        self.runs = []  # (char_style, bold, italic, text)
+
+    def add_text(self, fmt: tuple, text: str):
+        if self.runs and self.runs[-1][:3] == fmt:
+            self.runs[-1] = (*fmt, self.runs[-1][3] + text)
+        else:
+            self.runs.append((*fmt, text))
+
+    def heading_level(self) -> Optional[int]:
+        match = HEADING_STYLE_PATTERN.match(self.style or '')
+        return int(match.group(1)) if match else None
+
+    def to_md(self) -> str:
+        text = ''.join(render_run(*run) for run in self.runs)
+        lines = [re.sub(' +', ' ', line).strip()
+                 for line in text.split(LINE_BREAK)]
+        lines = [line for line in lines if line != '']
+
+        level = self.heading_level()
+        if level is not None:
+            content = ' '.join(lines)
+            return '#' * level + ' ' + content if content else ''
+
+        return LINE_BREAK.join(escape_line_start(line) for line in lines)
+
+
+def render_run(char_style: Optional[str], bold: bool, italic: bool, text: str) -> str:
+    text = text.replace('\t', ' ')
+    if char_style is None and not bold and not italic:
+        return LINE_BREAK.join(escape(part) for part in text.split(LINE_BREAK))
+
+    # Formatting markers go around the text, with surrounding spaces outside.
+    core = text.strip(' ')
+    if core == '':
+        return text
+    lead = text[:len(text) - len(text.lstrip(' '))]
+    trail = text[len(text.rstrip(' ')):]
+
+    if char_style == VERBATIM_STYLE:
+        return f'{lead}`{core}`{trail}'
+
+    core = LINE_BREAK.join(escape(part) for part in core.split(LINE_BREAK))
+    if italic:
+        core = f'*{core}*'
+    if bold:
+        core = f'**{core}**'
+    if char_style is not None:
+        core = f'[{core}]{{custom-style="{char_style}"}}'
+
+    return lead + core + trail
+
+
+def iter_paragraphs(docx: zipfile.ZipFile) -> Iterator[Paragraph]:
+    style_names, default_styles = read_style_names(docx)
+    paragraphs = []
+    body = None
+    fmt = (None, False, False)
+
+    with docx.open('word/document.xml') as xml_file:
+        for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+            tag = elem.tag
+
+            if event == 'start':
+                if tag == f'{W}body':
+                    body = elem
+                elif tag == f'{W}p':
+                    paragraphs.append(Paragraph())
+                elif tag == f'{W}r':
+                    fmt = (None, False, False)
+                continue
+
+            if not paragraphs:
+                continue
+            paragraph = paragraphs[-1]
+
+            if tag == f'{W}pStyle':
+                style_id = elem.get(f'{W}val')
+                paragraph.style = style_names.get(style_id, style_id)
+            elif tag == f'{W}rPr':
+                style = elem.find(f'{W}rStyle')
+                bold = elem.find(f'{W}b')
+                italic = elem.find(f'{W}i')
+                style_id = style.get(f'{W}val') if style is not None else None
+                fmt = (
+                    None if style_id is None or style_id in default_styles
+                    else style_names.get(style_id, style_id),
+                    bold is not None and is_on(bold),
+                    italic is not None and is_on(italic),
+                )
+            elif tag == f'{W}t':
+                paragraph.add_text(fmt, elem.text or '')
+            elif tag == f'{W}tab':
+                paragraph.add_text(fmt, ' ')
+            elif tag in (f'{W}br', f'{W}cr'):
+                paragraph.add_text(fmt, LINE_BREAK)
+            elif tag == f'{W}p':
+                yield paragraphs.pop()
+                # Drop finished elements so memory stays flat on large files.
+                if not paragraphs and body is not None:
+                    body.clear()
+
+
+def iter_md_blocks(docx_filename) -> Iterator[str]:
+    with zipfile.ZipFile(docx_filename) as docx:
+        for paragraph in iter_paragraphs(docx):
+            md = paragraph.to_md()
+            if md != '':
+                yield md
+
+
+def word_bytes_to_md_native(word: bytes) -> str:
+    return ''.join(('\n' if i > 0 else '') + block + '\n'
+                   for i, block in enumerate(iter_md_blocks(io.BytesIO(word))))
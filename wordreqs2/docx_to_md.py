@@ -1,28 +1,62 @@
+import io
+import os
+import re
 import subprocess
+import tempfile
+from functools import cache
 
 
-def word_to_md(word_filename, md_filename):
-    try:
-        subprocess.run(['pandoc', word_filename,
-                        '-o', md_filename,
-                        '--markdown-headings=atx',
-                        '--wrap=none',
-                        '-f', 'docx+styles'])
-    except FileNotFoundError as e:
+PANDOC_ARGS = ['--markdown-headings=atx', '--wrap=none', '-f', 'docx+styles']
+# Older pandoc is given docx in a temporary file rather than on stdin.
+PANDOC_STDIN_VERSION = (3, 0)
+
+
+def word_bytes_to_md(word: bytes) -> str:
+    """Convert docx contents with pandoc through stdin and stdout, or through
+    a temporary file for a pandoc too old to read docx from stdin."""
+    if pandoc_version() is None:
         raise Exception('pandoc not found. Is pandoc 2.14 or later installed and in your path?')
 
+    if pandoc_reads_stdin():
+        result = subprocess.run(['pandoc', '-t', 'markdown', *PANDOC_ARGS],
+                                input=word, capture_output=True, check=True)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            word_filename = os.path.join(tmp_dir, 'word.docx')
+            with open(word_filename, 'wb') as f:
+                f.write(word)
+            result = subprocess.run(['pandoc', word_filename, '-t', 'markdown', *PANDOC_ARGS],
+                                    capture_output=True, check=True)
+
+    return result.stdout.decode('utf8').replace('\r\n', '\n')
+
+
+@cache
+def pandoc_version():
+    try:
+        result = subprocess.run(['pandoc', '--version'],
+                                capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+
+    return result.stdout.split('\n')[0].strip()
+
+
+def pandoc_reads_stdin() -> bool:
+    """Whether pandoc is new enough to be given docx on stdin."""
+    match = re.search(r'(\d+)\.(\d+)', pandoc_version() or '')
+    return match is not None and tuple(map(int, match.groups())) >= PANDOC_STDIN_VERSION
+
 
-def newline_after_meta(in_name, out_name):
-    with open(in_name, 'r') as in_file:
-        lines = in_file.readlines()
-
-    with open(out_name, 'w') as out_file:
-        for line in lines:
-            if line[0:2] == '\\[':
-                split_point = line.index('\\]') + 2
-                # Write metadata
-                out_file.write(line[0:split_point] + '\n')
-                # Write requirement, removing leading space if it exists
-                out_file.write(line[split_point:].strip() + '\n')
-            else:
-                out_file.write(line)
+def newline_after_meta_text(text: str) -> str:
+    out = []
+    for line in io.StringIO(text):
+        if line[0:2] == '\\[':
+            split_point = line.index('\\]') + 2
+            # Write metadata
+            out.append(line[0:split_point] + '\n')
+            # Write requirement, removing leading space if it exists
+            out.append(line[split_point:].strip() + '\n')
+        else:
+            out.append(line)
+    return ''.join(out)
@@ -0,0 +1,94 @@
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+
+from wordreqs2.config import ProjConfig
+from .load import ReqDB
+from .lint import build_lint_table
+from .profiling import span
+
+
+# Rows converted and written at a time, so large tables are never turned
+# into one big string.
+CHUNK_ROWS = 50_000
+
+
+def has_pyarrow() -> bool:
+    try:
+        import pyarrow
+    except ImportError:
+        return False
+    return True
+
+
+def default_format() -> str:
+    return "parquet" if has_pyarrow() else "csv"
+
+
+def iter_chunks(table: pd.DataFrame):
+    for start in range(0, len(table), CHUNK_ROWS):
+        yield table.iloc[start:start + CHUNK_ROWS]
+
+
+def write_csv(table: pd.DataFrame, filename: Path):
+    with open(filename, "w", encoding="utf8", newline="") as f:
+        table.iloc[:0].to_csv(f, index=False)
+        for chunk in iter_chunks(table):
+            chunk.to_csv(f, index=False, header=False)
+
+
+def write_jsonl(table: pd.DataFrame, filename: Path):
+    with open(filename, "w", encoding="utf8", newline="\n") as f:
+        for chunk in iter_chunks(table):
+            f.write(chunk.to_json(orient="records", lines=True, force_ascii=False))
+
+
+def write_arrow(table: pd.DataFrame, filename: Path, fmt: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(table, preserve_index=False)
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(filename, schema)
+    else:
+        writer = pa.ipc.new_file(filename, schema)
+
+    with writer:
+        for chunk in iter_chunks(table):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema,
+                                                    preserve_index=False))
+
+
+def write_table(table: pd.DataFrame, filename: Path, fmt: str):
+    if fmt in ("parquet", "arrow"):
+        write_arrow(table, filename, fmt)
+    elif fmt == "csv":
+        write_csv(table, filename)
+    elif fmt == "jsonl":
+        write_jsonl(table, filename)
+    else:
+        raise ValueError(f"Unknown export format {fmt}")
+
+
+def run_export(db: ReqDB, config: ProjConfig, out_dir="export",
+               fmt: Optional[str] = None, docs_filter: Optional[list[str]]=None):
+    fmt = fmt or default_format()
+    if fmt in ("parquet", "arrow") and not has_pyarrow():
+        raise Exception(f"Exporting {fmt} needs pyarrow. Install it, or use csv or jsonl.")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with span("lints"):
+        lints = build_lint_table(db, config)
+
+    tables = {"reqs": db.reqs, "traces": db.traces, "signals": db.signals,
+              "lints": lints}
+    docs_filter = docs_filter or list(config.docs.keys())
+
+    for name, table in tables.items():
+        table = table[table.doc_id.isin(docs_filter)]
+        filename = out_dir / f"{name}.{fmt}"
+        with span(f"export {name}"):
+            write_table(table, filename, fmt)
+        print(f"📦 Exported {len(table)} {name} rows to {filename}")
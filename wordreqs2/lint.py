@@ -1,16 +1,62 @@
-from typing import Self, Optional
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager, suppress
+from typing import Self, Optional, TextIO
 from dataclasses import dataclass
+import io
+import os
+import subprocess
+import sys
 from rich.console import Console
 from rich.table import Table
+import numpy as np
 import pandas as pd
 
 from wordreqs2.config import ProjConfig
+from .cache import TMP_DIR, key_digest, read_json, write_json
+from .minhash import near_duplicate_pairs
+from .profiling import span
+from .signals import SignalIndex, is_external_signal
 
 
-class Lint:
+# Bump when lint rules change so cached lint results are discarded.
+LINT_CACHE_VERSION = 1
+
+# Lints rendered and written at a time.
+PRINT_BATCH = 1000
+
+# Columns of the lint table. Each lint type fills the columns it needs.
+LINT_COLUMNS = ["lint_type", "doc_id", "req_id", "contents", "signal",
+                "to_doc_id", "to_req_id"]
+
+
+class Lint(ABC):
+    # Lint table columns passed, in order, to the constructor.
+    fields: tuple[str, ...] = ()
+
     def __init__(self, doc_id):
         pass
 
+    @classmethod
+    def to_table(cls, hits: pd.DataFrame) -> pd.DataFrame:
+        table = hits.loc[:, list(cls.fields)]
+        table.insert(0, "lint_type", cls.__name__)
+        return table.reindex(columns=LINT_COLUMNS)
+
+    @classmethod
+    def from_record(cls, record: dict) -> Self:
+        return cls(*[record[field] for field in cls.fields])
+
+    @classmethod
+    def cache_key(cls, doc_id: str, config: ProjConfig, deps: "LintDeps") -> list:
+        """Inputs that this lint's results for doc_id depend on."""
+        return [deps.fingerprints[doc_id]]
+
+    @classmethod
+    @abstractmethod
+    def run(cls, db, config: ProjConfig, doc_ids: list[str]) -> pd.DataFrame:
+        """Lint table rows for the requirements of doc_ids."""
+
 
 @dataclass
 class BasicDocReqLint(Lint):
@@ -18,6 +64,8 @@ class BasicDocReqLint(Lint):
     req_id: str
     content: str
 
+    fields = ("doc_id", "req_id", "contents")
+
     @property
     def msg(self):
         return f"{self.doc_id}:{type(self).__name__} \\[{self.req_id}] {self.content}"
@@ -25,45 +73,100 @@ class BasicDocReqLint(Lint):
 
 class MalformedReqID(BasicDocReqLint):
     @classmethod
-    def check(cls, reqs, config: ProjConfig) -> list[Self]:
-        lints = []
+    def cache_key(cls, doc_id, config, deps):
+        return [deps.fingerprints[doc_id], config.docs[doc_id].req_id_prefix]
 
-        reqs["prefix"] = reqs.doc_id.apply(lambda doc_id: config.docs[doc_id].req_id_prefix)
+    @classmethod
+    def run(cls, db, config, doc_ids):
+        return cls.check(db.reqs[db.reqs.doc_id.isin(doc_ids)], config)
 
-        for i, req in reqs.iterrows():
-            is_bad = False
+    @classmethod
+    def check(cls, reqs, config: ProjConfig) -> pd.DataFrame:
+        is_bad = pd.Series(False, index=reqs.index)
 
-            if not req.req_id.startswith(req.prefix):
-                is_bad = True
+        for doc_id, doc_config in config.docs.items():
+            prefix = doc_config.req_id_prefix
+            req_ids = reqs.req_id[reqs.doc_id == doc_id]
+            is_bad[req_ids.index] = (
+                ~req_ids.str.startswith(prefix)
+                | ~req_ids.str.slice(len(prefix)).str.isdigit()
+            )
 
-            if not req.req_id.replace(req.prefix, "").isdigit():
-                is_bad = True
+        return cls.to_table(reqs[is_bad])
 
-            if is_bad:
-                lints.append(
-                    cls(req.doc_id, req.req_id, req.contents)
-                )
 
-        return lints
+class DuplicateID(BasicDocReqLint):
+    @classmethod
+    def cache_key(cls, doc_id, config, deps):
+        return [deps.fingerprints[doc_id], deps.shared_req_ids.get(doc_id)]
 
+    @classmethod
+    def run(cls, db, config, doc_ids):
+        table = cls.check(db.reqs)
+        return table[table.doc_id.isin(doc_ids)]
+
+    @classmethod
+    def check(cls, reqs) -> pd.DataFrame:
+        return cls.to_table(reqs[reqs.duplicated("req_id", keep=False)])
+
+
+class NearDuplicate(Lint):
+    fields = ("doc_id", "req_id", "to_doc_id", "to_req_id")
+
+    def __init__(self, doc_id, req_id, other_doc_id, other_req_id):
+        self.doc_id = doc_id
+        self.req_id = req_id
+        self.other_doc_id = other_doc_id
+        self.other_req_id = other_req_id
+
+    @property
+    def msg(self):
+        return f"{self.doc_id}:{type(self).__name__} \\[{self.req_id}] Text is nearly the same as \"{self.other_req_id}\" in {self.other_doc_id}"
+
+    @classmethod
+    def cache_key(cls, doc_id, config, deps):
+        deleted = {doc_id: doc_config.deleted for doc_id, doc_config in config.docs.items()}
+        return [deps.fingerprints[doc_id], deps.all_fingerprints, deleted,
+                config.near_duplicate_threshold]
 
-class DuplicateID(BasicDocReqLint):
     @classmethod
-    def check(cls, reqs) -> list[Self]:
-        duplicated_reqs = reqs.loc[reqs.duplicated("req_id", keep=False)]
-        lints = [cls(row.doc_id, row.req_id, row.contents)
-                for i, row in duplicated_reqs.iterrows()]
-        return lints
+    def run(cls, db, config, doc_ids):
+        table = cls.check(db.reqs, config.near_duplicate_threshold)
+        return table[table.doc_id.isin(doc_ids)]
+
+    @classmethod
+    def check(cls, reqs, threshold: float) -> pd.DataFrame:
+        reqs = reqs[~reqs.is_deleted.astype(bool)]
+        pairs = near_duplicate_pairs(reqs.contents.tolist(), threshold)
+
+        # Report each pair against both requirements.
+        this = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        other = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        order = np.lexsort([other, this])
+        this, other = this[order], other[order]
+
+        hits = pd.DataFrame({
+            "doc_id": reqs.doc_id.to_numpy()[this],
+            "req_id": reqs.req_id.to_numpy()[this],
+            "to_doc_id": reqs.doc_id.to_numpy()[other],
+            "to_req_id": reqs.req_id.to_numpy()[other],
+        })
+        return cls.to_table(hits)
 
 
 class NoShallOrMay(BasicDocReqLint):
     @classmethod
-    def check(cls, reqs) -> list[Self]:
-        lints = [
-            cls(req.doc_id, req.req_id, req.contents) 
-            for i, req in reqs[~reqs.contents.str.contains("shall|may") & ~reqs.is_deleted].iterrows()
-        ]
-        return lints
+    def cache_key(cls, doc_id, config, deps):
+        return [deps.fingerprints[doc_id], config.docs[doc_id].deleted]
+
+    @classmethod
+    def run(cls, db, config, doc_ids):
+        return cls.check(db.reqs[db.reqs.doc_id.isin(doc_ids)])
+
+    @classmethod
+    def check(cls, reqs) -> pd.DataFrame:
+        is_bad = ~reqs.contents.str.contains("shall|may") & ~reqs.is_deleted
+        return cls.to_table(reqs[is_bad])
 
 
 class ModifiedSignalNotUsed(Lint):
@@ -72,12 +175,12 @@ class ModifiedSignalNotUsed(Lint):
 
 class UncapitalizedBool(BasicDocReqLint):
     @classmethod
-    def check(cls, reqs) -> list[Self]:
-        lints = [
-            cls(req.doc_id, req.req_id, req.contents)
-            for i, req in reqs[reqs.contents.str.contains("true|false")].iterrows()
-        ]
-        return lints
+    def run(cls, db, config, doc_ids):
+        return cls.check(db.reqs[db.reqs.doc_id.isin(doc_ids)])
+
+    @classmethod
+    def check(cls, reqs) -> pd.DataFrame:
+        return cls.to_table(reqs[reqs.contents.str.contains("true|false")])
 
 
 @dataclass
@@ -86,24 +189,31 @@ class UnsetSignal(Lint):
     req_id: str
     signal: str
 
+    fields = ("doc_id", "req_id", "signal")
+
     @property
     def msg(self):
         return f"{self.doc_id}:{type(self).__name__} \\[{self.req_id}] Signal \"{self.signal}\" is never set"
 
     @classmethod
-    def check(cls, signals, spec_inputs) -> list[Self]:
-        lints = []
-        try:
-            set_signals = signals[signals.modified]["name"].unique()
-        except KeyError:
-            set_signals = []
+    def cache_key(cls, doc_id, config, deps):
+        return [deps.fingerprints[doc_id], config.docs[doc_id].inputs,
+                deps.read_signals_set.get(doc_id)]
 
-        for i, signal in signals[signals.modified == False].iterrows():
-            name = signal["name"]
-            if name not in set_signals and name not in spec_inputs[signal.doc_id]:
-                lints.append(cls(signal.doc_id, signal.req_id, signal["name"]))
+    @classmethod
+    def run(cls, db, config, doc_ids):
+        spec_inputs = {doc_id: doc_config.inputs
+                       for doc_id, doc_config in config.docs.items()}
+        signals = db.signals[db.signals.doc_id.isin(doc_ids)]
+        return cls.check(signals, db.signal_index, spec_inputs)
+
+    @classmethod
+    def check(cls, signals, index: SignalIndex, spec_inputs) -> pd.DataFrame:
+        is_bad = (~signals.modified.to_numpy(dtype=bool)
+                  & ~signals["name"].isin(index.set_names).to_numpy()
+                  & ~is_external_signal(signals, spec_inputs))
 
-        return lints
+        return cls.to_table(signals[is_bad].rename(columns={"name": "signal"}))
 
 
 @dataclass
@@ -112,27 +222,36 @@ class UnusedSignal(Lint):
     req_id: str
     signal: str
 
+    fields = ("doc_id", "req_id", "signal")
+
     @property
     def msg(self):
         return f"{self.doc_id}:{type(self).__name__} \\[{self.req_id}] Signal \"{self.signal}\" is never used"
 
     @classmethod
-    def check(cls, signals, spec_outputs) -> list[Self]:
-        lints = []
-        try:
-            unset_signals = signals[signals.modified == False]["name"].unique()
-        except KeyError:
-            set_signals = []
+    def cache_key(cls, doc_id, config, deps):
+        return [deps.fingerprints[doc_id], config.docs[doc_id].outputs,
+                deps.set_signals_read.get(doc_id)]
+
+    @classmethod
+    def run(cls, db, config, doc_ids):
+        spec_outputs = {doc_id: doc_config.outputs
+                        for doc_id, doc_config in config.docs.items()}
+        signals = db.signals[db.signals.doc_id.isin(doc_ids)]
+        return cls.check(signals, db.signal_index, spec_outputs)
 
-        for i, signal in signals[signals.modified].iterrows():
-            name = signal["name"]
-            if name not in unset_signals and name not in spec_outputs[signal.doc_id]:
-                lints.append(cls(signal.doc_id, signal.req_id, signal["name"]))
+    @classmethod
+    def check(cls, signals, index: SignalIndex, spec_outputs) -> pd.DataFrame:
+        is_bad = (signals.modified.to_numpy(dtype=bool)
+                  & ~signals["name"].isin(index.read_names).to_numpy()
+                  & ~is_external_signal(signals, spec_outputs))
 
-        return lints
+        return cls.to_table(signals[is_bad].rename(columns={"name": "signal"}))
 
 
 class TracedReqNotFound(Lint):
+    fields = ("doc_id", "req_id", "to_doc_id", "to_req_id")
+
     def __init__(self, doc_id, req_id, parent_doc_id, parent_req_id):
         self.doc_id = doc_id
         self.req_id = req_id
@@ -144,75 +263,261 @@ class TracedReqNotFound(Lint):
         return f"{self.doc_id}:{type(self).__name__} \\[{self.req_id}] Requirement \"{self.parent_req_id}\" not found in {self.parent_doc_id}"
 
     @classmethod
-    def check(cls, reqs, traces) -> list[Self]:
-        matched = traces.merge(
-            reqs, how="left",
-            left_on=["to_doc_id", "to_req_id"],
-            right_on=["doc_id", "req_id"],
-            suffixes=[None, "_parent"]
-        ).drop(["contents", "prefix"], axis=1)
+    def cache_key(cls, doc_id, config, deps):
+        parent = config.docs[doc_id].parent
+        return [deps.fingerprints[doc_id], parent, deps.req_ids.get(parent)]
+
+    @classmethod
+    def run(cls, db, config, doc_ids):
+        return cls.check(db.reqs, db.traces[db.traces.doc_id.isin(doc_ids)])
+
+    @classmethod
+    def check(cls, reqs, traces) -> pd.DataFrame:
+        targets = pd.MultiIndex.from_frame(traces[["to_doc_id", "to_req_id"]].astype(object))
+        existing = pd.MultiIndex.from_frame(reqs[["doc_id", "req_id"]].astype(object))
+        return cls.to_table(traces[~targets.isin(existing)])
+
+
+# In the order lints are reported.
+LINT_RULES = [
+    MalformedReqID, DuplicateID, NearDuplicate, NoShallOrMay, UncapitalizedBool,
+    TracedReqNotFound, UnsetSignal, UnusedSignal,
+]
+
+LINT_TYPES = {cls.__name__: cls for cls in LINT_RULES}
+
+
+def doc_digests(table: pd.DataFrame, column: str, unique=False) -> dict[str, str]:
+    groups = table.groupby("doc_id", sort=False, observed=True)[column]
+    return {doc_id: key_digest(sorted(set(values)) if unique else list(values))
+            for doc_id, values in groups}
+
+
+class LintDeps:
+    """Digests of the inputs lint rules read, per document and project-wide.
+
+    Rules that look across documents are keyed only on the part of the other
+    documents that meets each document, e.g. the IDs it shares with them, so
+    an unrelated edit elsewhere keeps its cached results.
+    """
+
+    def __init__(self, db, config: ProjConfig):
+        self.fingerprints = db.fingerprints
+        self.all_fingerprints = key_digest(db.fingerprints)
+        self.req_ids = doc_digests(db.reqs, "req_id")
+
+        # IDs of each document that another document also uses.
+        doc_req_ids = db.reqs[["doc_id", "req_id"]].drop_duplicates()
+        shared = doc_req_ids[doc_req_ids.duplicated("req_id", keep=False)]
+        self.shared_req_ids = doc_digests(shared, "req_id", unique=True)
+
+        # Signals each document reads that are set, and sets that are read.
+        signals = db.signals
+        index = db.signal_index
+        modified = signals.modified.to_numpy(dtype=bool)
+        is_set = signals["name"].isin(index.set_names).to_numpy()
+        is_read = signals["name"].isin(index.read_names).to_numpy()
+        self.read_signals_set = doc_digests(signals[~modified & is_set], "name", unique=True)
+        self.set_signals_read = doc_digests(signals[modified & is_read], "name", unique=True)
+
+
+def lint_cache_filename(doc_id: str):
+    return TMP_DIR / f"{doc_id}.lint.json"
+
+
+def build_lint_table(db, config: ProjConfig, use_cache=True) -> pd.DataFrame:
+    """Run every lint rule, reusing cached results for unchanged inputs.
+
+    Results are cached per document and per rule, keyed on the rule's
+    cache_key, so a rule only runs again for the documents whose inputs
+    changed.
+    """
+    doc_ids = list(config.docs.keys())
+    if not use_cache:
+        tables = []
+        for rule in LINT_RULES:
+            with span(rule.__name__):
+                tables.append(rule.run(db, config, doc_ids))
+        return pd.concat(tables, ignore_index=True)
+
+    with span("lint deps"):
+        deps = LintDeps(db, config)
+
+    caches = {}
+    with span("read lint cache"):
+        for doc_id in doc_ids:
+            cache = read_json(lint_cache_filename(doc_id), default={})
+            if cache.get("version") != LINT_CACHE_VERSION:
+                cache = {"version": LINT_CACHE_VERSION, "keys": {}, "lints": {}}
+            caches[doc_id] = cache
+
+    changed = set()
+    tables = []
 
-        unfound = matched[matched.req_id_parent.isnull()]
+    for rule in LINT_RULES:
+        name = rule.__name__
+        keys = {doc_id: key_digest(rule.cache_key(doc_id, config, deps))
+                for doc_id in doc_ids}
+        stale = [doc_id for doc_id in doc_ids
+                 if caches[doc_id]["keys"].get(name) != keys[doc_id]]
 
-        lints = [cls(row.doc_id, row.req_id, row.to_doc_id, row.to_req_id)
-                for i, row in unfound.iterrows()]
+        fresh = {}
+        if stale:
+            with span(name):
+                fresh_table = rule.run(db, config, stale)
+            fresh = {doc_id: group.loc[:, list(rule.fields)].values.tolist()
+                     for doc_id, group in fresh_table.groupby("doc_id", sort=False, observed=True)}
 
-        return lints
+        rows = []
+        for doc_id in doc_ids:
+            cache = caches[doc_id]
+            if doc_id in stale:
+                cache["keys"][name] = keys[doc_id]
+                cache["lints"][name] = fresh.get(doc_id, [])
+                changed.add(doc_id)
+            rows += cache["lints"][name]
+
+        tables.append(rule.to_table(pd.DataFrame(rows, columns=list(rule.fields))))
+
+    with span("write lint cache"):
+        for doc_id in changed:
+            write_json(lint_cache_filename(doc_id), caches[doc_id])
+
+    return pd.concat(tables, ignore_index=True)
+
+
+def lints_from_table(table: pd.DataFrame) -> list[Lint]:
+    return [LINT_TYPES[record["lint_type"]].from_record(record)
+            for record in table.to_dict("records")]
 
 
 def check_lints(db, config: ProjConfig) -> list[Lint]:
-    lints = []
-    lints += MalformedReqID.check(db.reqs, config)
-    lints += DuplicateID.check(db.reqs)
-    lints += NoShallOrMay.check(db.reqs)
-    lints += UncapitalizedBool.check(db.reqs)
-    lints += TracedReqNotFound.check(db.reqs, db.traces)
+    return lints_from_table(build_lint_table(db, config))
 
-    spec_inputs = {
-        doc_id: doc_config.inputs
-        for doc_id, doc_config in config.docs.items()
-    }
-    lints += UnsetSignal.check(db.signals, spec_inputs)
 
-    spec_outputs = {
-        doc_id: doc_config.outputs
-        for doc_id, doc_config in config.docs.items()
-    }
-    lints += UnusedSignal.check(db.signals, spec_outputs)
+def first_line(msg: str) -> str:
+    return msg.split("\n")[0]
 
-    return lints
 
+def plain_msg(msg: str) -> str:
+    """First line of a lint message, without rich's markup escapes."""
+    return first_line(msg).replace("\\[", "[")
 
-def run_lint(db, config: ProjConfig, docs_filter: Optional[list[str]]=None):
-    lints = check_lints(db, config)
 
-    console = Console(soft_wrap=True, highlight=False)
+def count_lints(table: pd.DataFrame) -> dict[str, Counter]:
+    """Number of lints of each type, per document."""
+    counts = {}
+    for lint_type, doc_id in zip(table.lint_type, table.doc_id):
+        counts.setdefault(lint_type, Counter())[doc_id] += 1
+    return counts
 
-    docs_filter = docs_filter or list(config.docs.keys())
-    lints = [lint for lint in lints
-             if lint.doc_id in docs_filter]
-
-    for lint in lints:
-        console.print(lint.msg.split("\n")[0], overflow="ellipsis")
-    
-    # Make summary
-    df = pd.DataFrame(data={"lints": lints})
-    df["lint_type"] = df.lints.apply(lambda l: type(l).__name__)
-    df["doc_id"] = df.lints.apply(lambda l: l.doc_id)
-    df = df.groupby(["lint_type", "doc_id"]).count().lints
-    df = df.unstack("doc_id", fill_value=0)
-    
-    print()
 
+def summary_rows(counts: dict[str, Counter],
+                 doc_order: list[str]) -> tuple[list[str], list[list[str]]]:
+    """Summary column names and rows, ending with the totals row. Documents
+    with lints are columns in doc_order."""
+    doc_ids = [doc_id for doc_id in doc_order
+               if any(doc_id in doc_counts for doc_counts in counts.values())]
+    rows = [[lint_type] + [str(counts[lint_type][doc_id]) for doc_id in doc_ids]
+            for lint_type in sorted(counts)]
+    totals = ["All"] + [str(sum(doc_counts[doc_id] for doc_counts in counts.values()))
+                        for doc_id in doc_ids]
+    return ["Lint"] + doc_ids, rows + [totals]
+
+
+def print_rich_summary(console: Console, counts: dict[str, Counter], doc_order: list[str]):
+    columns, rows = summary_rows(counts, doc_order)
     table = Table()
-    table.add_column("Lint")
-    for col in df.columns:
+    for col in columns:
         table.add_column(col)
-    
-    for lint_type, row in df.iterrows():
-        table.add_row(str(lint_type), *[str(field) for field in row.values])
-
+    for row in rows[:-1]:
+        table.add_row(*row)
     table.add_section()
-    table.add_row("All", *[str(field) for field in df.stack().groupby("doc_id").sum().values])
-
+    table.add_row(*rows[-1])
     console.print(table)
+
+
+def print_plain_summary(out: TextIO, counts: dict[str, Counter], doc_order: list[str]):
+    columns, rows = summary_rows(counts, doc_order)
+    widths = [max(len(row[i]) for row in [columns] + rows) for i in range(len(columns))]
+    for row in [columns] + rows:
+        out.write("  ".join([row[0].ljust(widths[0])] +
+                            [field.rjust(width) for field, width in zip(row[1:], widths[1:])])
+                  .rstrip() + "\n")
+
+
+class PagerConsole(Console):
+    def on_broken_pipe(self):
+        # Rich exits when the pager is quit early. Leave that to open_output.
+        raise BrokenPipeError
+
+
+@contextmanager
+def open_output(pager: bool):
+    """Where lint output goes: stdout, or the stdin of $PAGER as it is written."""
+    if not pager:
+        yield sys.stdout
+        return
+
+    command = os.environ.get("PAGER") or ("more" if os.name == "nt" else "less -R")
+    process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE)
+    out = io.TextIOWrapper(process.stdin, encoding="utf8", errors="replace")
+    # The pager may be closed before all lints are written.
+    try:
+        with suppress(BrokenPipeError):
+            yield out
+    finally:
+        with suppress(BrokenPipeError):
+            out.close()
+        process.wait()
+
+
+def write_json_lints(out: TextIO, table: pd.DataFrame):
+    """One JSON object per lint, with its message and lint table columns."""
+    table = table.assign(msg=[plain_msg(lint.msg) for lint in lints_from_table(table)])
+    for start in range(0, len(table), PRINT_BATCH):
+        chunk = table.iloc[start:start + PRINT_BATCH]
+        out.write(chunk.to_json(orient="records", lines=True, force_ascii=False))
+
+
+def run_lint(db, config: ProjConfig, docs_filter: Optional[list[str]]=None,
+             fmt: str = "rich", max_lints: Optional[int] = None, pager=False):
+    """Print lints and a summary of their counts per type and document.
+
+    Lints are written in batches. Only the first max_lints are printed, but
+    the summary counts all of them. Returns the number of lints.
+    """
+    table = build_lint_table(db, config)
+
+    docs_filter = docs_filter or list(config.docs.keys())
+    table = table[table.doc_id.isin(docs_filter)]
+    shown = table if max_lints is None else table.iloc[:max_lints]
+
+    with open_output(pager) as out:
+        if fmt == "json":
+            write_json_lints(out, shown)
+            return len(table)
+
+        console_type = PagerConsole if pager else Console
+        console = console_type(file=out, soft_wrap=True, highlight=False)
+        msgs = [lint.msg for lint in lints_from_table(shown)]
+        for start in range(0, len(msgs), PRINT_BATCH):
+            batch = msgs[start:start + PRINT_BATCH]
+            if fmt == "rich":
+                console.print("\n".join(first_line(msg) for msg in batch),
+                              overflow="ellipsis")
+            else:
+                out.write("".join(plain_msg(msg) + "\n" for msg in batch))
+
+        if len(shown) < len(table):
+            out.write(f"... {len(table) - len(shown)} more lints not shown\n")
+
+        out.write("\n")
+        counts = count_lints(table)
+        doc_order = list(config.docs.keys())
+        if fmt == "rich":
+            print_rich_summary(console, counts, doc_order)
+        else:
+            print_plain_summary(out, counts, doc_order)
+
+    return len(table)
@@ -1,108 +1,208 @@
+import os
+from multiprocessing import Pool
+from typing import Iterable, Optional
+import numpy as np
 import pandas as pd
-from . import md_spec
-from .md_spec import Spec
 from .config import ProjConfig
+from .prepare import worker_count
+from .profiling import span, record
+from .spec_cache import DocColumns, load_doc_columns, load_doc_columns_job
+from .cache import TMP_DIR
+from .signals import SignalIndex
 
 
-def get_spec(doc_id: str):
-    spec = md_spec.parse_file(f"tmp/{doc_id}.md")
-    return spec
-
-
-def get_reqs_as_df(doc_id: str, spec: Spec) -> pd.DataFrame:
-    data = {
-        "doc_id": [],
-        "req_id": [],
-        "contents": [],
-    }
-
-    for req in spec.reqs:
-        data["doc_id"].append(doc_id)
-        data["req_id"].append(req.id)
-        data["contents"].append(req.content)
-    
-    return pd.DataFrame(data)
-
-
-def get_signals_as_df(doc_id: str, spec: Spec) -> pd.DataFrame:
-    data = {
-        "name": [],
-        "modified": [],
-        "doc_id": [],
-        "req_id": [],
-    }
-
-    for req in spec.reqs:
-        for signal in req.signals:
-            data["doc_id"].append(doc_id)
-            data["req_id"].append(req.id)
-            data["name"].append(signal)
-            data["modified"].append(False)
-        
-        for signal in req.mod_signals:
-            data["doc_id"].append(doc_id)
-            data["req_id"].append(req.id)
-            data["name"].append(signal)
-            data["modified"].append(True)
-    
-    return pd.DataFrame(data)
-
-
-def get_trace_as_df(doc_id: str, parent_doc_id: str, spec: Spec) -> pd.DataFrame:
-    data = {
-        "doc_id": [],
-        "req_id": [],
-        "to_doc_id": [],
-        "to_req_id": [],
-    }
-
-    for req in spec.reqs:
-        for req_trace_id in req.req_trace_ids:
-            data["doc_id"].append(doc_id)
-            data["req_id"].append(req.id)
-            data["to_doc_id"].append(parent_doc_id)
-            data["to_req_id"].append(req_trace_id)
-
-    return pd.DataFrame(data)
-
-
-def add_is_deleted(reqs: pd.DataFrame, config: ProjConfig):
-    reqs["is_deleted"] = False
-    deleted_text_map = {doc_id: doc_config.deleted
-                        for doc_id, doc_config in config.docs.items()
-                        if doc_config.deleted is not None}
-
-    for doc_id, deleted_text in deleted_text_map.items():
-        reqs.loc[reqs.doc_id == doc_id, "is_deleted"] = (reqs.contents == deleted_text)
+# Documents smaller than this are loaded in this process, as sending them to
+# a worker would take about as long as loading them.
+PARALLEL_MIN_BYTES = 1 << 20
+
+
+def doc_categories(config: ProjConfig) -> list[str]:
+    """Categories shared by every doc ID column, in configuration order."""
+    categories = list(config.docs.keys())
+    for doc_config in config.docs.values():
+        if doc_config.parent is not None and doc_config.parent not in categories:
+            categories.append(doc_config.parent)
+    return categories
+
+
+def doc_id_column(doc_ids: list[str], lengths: list[int],
+                  categories: list[str]) -> pd.Categorical:
+    codes = [categories.index(doc_id) for doc_id in doc_ids]
+    return pd.Categorical.from_codes(np.repeat(np.array(codes, dtype=np.int32), lengths),
+                                     categories=categories)
+
+
+def replace_doc_rows(table: pd.DataFrame, doc_rows: pd.DataFrame,
+                     doc_ids: list[str]) -> pd.DataFrame:
+    """Swap the rows of doc_ids in table for doc_rows, keeping documents in order."""
+    kept = table[~table.doc_id.isin(doc_ids)]
+    categorical = [column for column in table.columns
+                   if isinstance(table[column].dtype, pd.CategoricalDtype)]
+
+    table = pd.concat([kept, doc_rows], ignore_index=True)
+    for column in categorical:
+        # Columns whose categories differ, like signal names, need merging.
+        if not isinstance(table[column].dtype, pd.CategoricalDtype):
+            table[column] = table[column].astype("category")
+
+    order = np.argsort(table.doc_id.cat.codes.values, kind="stable")
+    return table.iloc[order].reset_index(drop=True)
+
+
+def md_size(doc_id: str) -> int:
+    try:
+        return os.path.getsize(TMP_DIR / f"{doc_id}.md")
+    except OSError:
+        return 0
 
 
 class ReqDB:
-    def __init__(self, config: ProjConfig):
-        self.specs = {doc_id: get_spec(doc_id) for doc_id in config.docs.keys()}
-        self.reqs = self.build_reqs_table(config)
-        self.traces = self.build_traces_table(config)
-        self.signals = self.build_signals_table(config)
-
-    def build_reqs_table(self, config: ProjConfig) -> pd.DataFrame:
-        empty = pd.DataFrame(columns=["doc_id", "req_id", "contents"])
-        spec_req_dfs = [get_reqs_as_df(doc_id, spec)
-                        for doc_id, spec in self.specs.items()]
-        req_df = pd.concat([empty] + spec_req_dfs, ignore_index=True)
-        add_is_deleted(req_df, config)
-        return req_df
-
-    def build_traces_table(self, config: ProjConfig) -> pd.DataFrame:
-        empty = pd.DataFrame(columns=["doc_id", "req_id", "to_doc_id", "to_req_id"])
-        spec_trace_dfs = [get_trace_as_df(doc_id, doc_config.parent, self.specs[doc_id])
-                          for doc_id, doc_config in config.docs.items()
-                          if doc_config.parent is not None]
-        trace_df = pd.concat([empty] + spec_trace_dfs, ignore_index=True)
-        return trace_df
-
-    def build_signals_table(self, config: ProjConfig) -> pd.DataFrame:
-        empty = pd.DataFrame(columns=["name", "modified", "doc_id", "req_id"])
-        signals_dfs = [get_signals_as_df(doc_id, spec)
-                       for doc_id, spec in self.specs.items()]
-
-        signals_df = pd.concat([empty] + signals_dfs, ignore_index=True)
-        return signals_df
\ No newline at end of file
+    def __init__(self, config: ProjConfig, doc_ids: Optional[Iterable[str]] = None,
+                 pool: Optional[Pool] = None):
+        """Load the specs of every document in config.
+
+        doc_ids may list the documents in any order, e.g. as they finish
+        converting, so each is loaded as soon as it is ready. Large documents
+        are loaded on pool, or on a pool of config.workers, while the rest
+        are read here.
+        """
+        # Keep only the columns of each spec, not the whole object graph.
+        self.fingerprints = {}
+        columns = {}
+        jobs = []
+        own_pool = None
+        parallel = pool is not None or (
+            len(config.docs) > 1 and worker_count(config.workers) > 1)
+
+        try:
+            for doc_id in (config.docs.keys() if doc_ids is None else doc_ids):
+                doc_config = config.docs[doc_id]
+                if not parallel or md_size(doc_id) < PARALLEL_MIN_BYTES:
+                    with span(f"spec {doc_id}"):
+                        self.fingerprints[doc_id], columns[doc_id] = \
+                            load_doc_columns(doc_id, doc_config)
+                    continue
+
+                if pool is None:
+                    own_pool = pool = Pool(min(worker_count(config.workers),
+                                               len(config.docs)))
+                jobs.append(pool.apply_async(load_doc_columns_job,
+                                             ((os.getcwd(), doc_id, doc_config),)))
+
+            with span("wait for specs"):
+                for job in jobs:
+                    doc_id, digest, doc_columns, seconds = job.get()
+                    # Workers can't add spans themselves, so record what they timed.
+                    record(f"spec {doc_id}", seconds)
+                    self.fingerprints[doc_id] = digest
+                    columns[doc_id] = doc_columns
+        finally:
+            if own_pool is not None:
+                own_pool.terminate()
+                own_pool.join()
+
+        missing = [doc_id for doc_id in config.docs if doc_id not in columns]
+        if missing:
+            raise ValueError(f"Documents were not loaded: {', '.join(missing)}")
+        columns = {doc_id: columns[doc_id] for doc_id in config.docs}
+
+        with span("build reqs"):
+            self.reqs = self.build_reqs_table(config, columns)
+        with span("build traces"):
+            self.traces = self.build_traces_table(config, columns)
+        with span("build signals"):
+            self.signals = self.build_signals_table(config, columns)
+        self._signal_index = None
+
+    def update_docs(self, config: ProjConfig, doc_ids: list[str]):
+        """Re-read the specs of doc_ids and patch their rows in the tables."""
+        columns = {}
+        for doc_id in doc_ids:
+            with span(f"spec {doc_id}"):
+                self.fingerprints[doc_id], columns[doc_id] = \
+                    load_doc_columns(doc_id, config.docs[doc_id])
+
+        self.reqs = replace_doc_rows(
+            self.reqs, self.build_reqs_table(config, columns), doc_ids)
+        self.traces = replace_doc_rows(
+            self.traces, self.build_traces_table(config, columns), doc_ids)
+        self.signals = replace_doc_rows(
+            self.signals, self.build_signals_table(config, columns), doc_ids)
+        self._signal_index = None
+
+    @property
+    def signal_index(self) -> SignalIndex:
+        """Setters and readers of each signal, built on first use."""
+        if self._signal_index is None:
+            with span("signal index"):
+                self._signal_index = SignalIndex(self.signals)
+        return self._signal_index
+
+    def build_reqs_table(self, config: ProjConfig,
+                         columns: dict[str, DocColumns]) -> pd.DataFrame:
+        req_ids, contents, is_deleted = [], [], []
+        for doc_id, doc_columns in columns.items():
+            deleted_text = config.docs[doc_id].deleted
+            req_ids += doc_columns.req_ids
+            contents += doc_columns.contents
+            is_deleted += [deleted_text is not None and content == deleted_text
+                           for content in doc_columns.contents]
+
+        doc_ids = doc_id_column(list(columns.keys()),
+                                [len(c.req_ids) for c in columns.values()],
+                                doc_categories(config))
+
+        return pd.DataFrame({
+            "doc_id": doc_ids,
+            "req_id": pd.Series(req_ids, dtype=object),
+            "contents": pd.Series(contents, dtype=object),
+            "is_deleted": pd.Series(is_deleted, dtype=bool),
+        })
+
+    def build_traces_table(self, config: ProjConfig,
+                           columns: dict[str, DocColumns]) -> pd.DataFrame:
+        columns = {doc_id: doc_columns for doc_id, doc_columns in columns.items()
+                   if config.docs[doc_id].parent is not None}
+        req_ids, to_req_ids = [], []
+        for doc_columns in columns.values():
+            req_ids += doc_columns.trace_req_ids
+            to_req_ids += doc_columns.trace_to_req_ids
+
+        categories = doc_categories(config)
+        lengths = [len(c.trace_req_ids) for c in columns.values()]
+
+        return pd.DataFrame({
+            "doc_id": doc_id_column(list(columns.keys()), lengths, categories),
+            "req_id": pd.Series(req_ids, dtype=object),
+            "to_doc_id": doc_id_column([config.docs[doc_id].parent for doc_id in columns],
+                                       lengths, categories),
+            "to_req_id": pd.Series(to_req_ids, dtype=object),
+        })
+
+    def build_signals_table(self, config: ProjConfig,
+                            columns: dict[str, DocColumns]) -> pd.DataFrame:
+        names, modified, req_ids = [], [], []
+        for doc_columns in columns.values():
+            names += doc_columns.signal_names
+            modified += doc_columns.signal_modified
+            req_ids += doc_columns.signal_req_ids
+
+        doc_ids = doc_id_column(list(columns.keys()),
+                                [len(c.signal_names) for c in columns.values()],
+                                doc_categories(config))
+
+        return pd.DataFrame({
+            "name": pd.Categorical(names),
+            "modified": pd.Series(modified, dtype=bool),
+            "doc_id": doc_ids,
+            "req_id": pd.Series(req_ids, dtype=object),
+        })
+
+    def memory_report(self) -> pd.DataFrame:
+        """Rows and deep memory use in bytes of each table."""
+        tables = {"reqs": self.reqs, "traces": self.traces, "signals": self.signals}
+        return pd.DataFrame({
+            "rows": {name: len(table) for name, table in tables.items()},
+            "bytes": {name: int(table.memory_usage(deep=True).sum())
+                      for name, table in tables.items()},
+        })
@@ -1,55 +1,125 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import re
-from .util import flatten
+
+
+# Bump when parsing changes so cached specs are discarded.
+PARSER_VERSION = 2
 
 
 class Spec():
     def __init__(self):
         self.blocks = []
         self.filename = None
+        self.digest = None
+        self._reqs = []
+        self._req_index = {}
+        self._duplicate_ids = set()
 
     def add_block(self, block):
         self.blocks.append(block)
 
+        if isinstance(block, Req):
+            self._reqs.append(block)
+            if block.id in self._req_index:
+                self._duplicate_ids.add(block.id)
+            else:
+                self._req_index[block.id] = block
+
     @property
-    def reqs(self):
-        return [block for block in self.blocks if isinstance(block, Req)]
+    def reqs(self) -> list["Req"]:
+        return self._reqs
 
     @property
     def mod_signals(self):
-        return set(flatten([req.mod_signals for req in self.reqs]))
+        return set().union(*[req.mod_signals for req in self._reqs])
 
     @property
     def signals(self):
-        return set(flatten([req.signals for req in self.reqs]))
-    
+        return set().union(*[req.signals for req in self._reqs])
+
     def get_req(self, req_id) -> "Req":
-        found = [req for req in self.reqs if req.id == req_id]
-        
-        if len(found) == 0:
-            raise IndexError("No req found!")
-        elif len(found) > 1:
+        if req_id in self._duplicate_ids:
             raise IndexError("More than 1 req found for this ID!")
-        
-        return found[0]
+
+        try:
+            return self._req_index[req_id]
+        except KeyError:
+            raise IndexError("No req found!")
+
+    def to_record(self) -> dict:
+        """The blocks as columns of strings, which load much faster than a
+        list per block.
+
+        A requirement's metadata line is only kept when it differs from the
+        one rebuilt from its ID and traces. Trace IDs and signal names are
+        joined, as neither can contain the separator.
+        """
+        record = {"kinds": "".join(block.RECORD_TAG for block in self.blocks),
+                  "headings": [], "ids": [], "contents": [], "traces": [],
+                  "metadata": {}, "signals": [], "mod_signals": []}
+        for block in self.blocks:
+            if isinstance(block, Heading):
+                record["headings"].append(block.md)
+                continue
+
+            if block.raw_metadata != block.meta_line():
+                record["metadata"][len(record["ids"])] = block.raw_metadata
+            record["ids"].append(block.id)
+            record["contents"].append(block.content)
+            record["traces"].append(",".join(block.req_trace_ids))
+            record["signals"].append("\n".join(sorted(block.signals)))
+            record["mod_signals"].append("\n".join(sorted(block.mod_signals)))
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Spec":
+        spec = cls()
+        headings = iter(record["headings"])
+        reqs = enumerate(zip(record["ids"], record["contents"], record["traces"],
+                             record["signals"], record["mod_signals"]))
+        metadata = record["metadata"]
+
+        for kind in record["kinds"]:
+            if kind == Heading.RECORD_TAG:
+                spec.add_block(Heading(next(headings)))
+                continue
+
+            i, (req_id, content, traces, signals, mod_signals) = next(reqs)
+            req = Req.__new__(Req)
+            req.id = req_id
+            req.content = content
+            req.req_trace_ids = traces.split(",") if traces else []
+            req.raw_metadata = metadata.get(i) or req.meta_line()
+            req.signals = set(signals.split("\n")) if signals else set()
+            req.mod_signals = set(mod_signals.split("\n")) if mod_signals else set()
+            req._content_lines = []
+            spec.add_block(req)
+        return spec
 
 
 class Heading():
+    __slots__ = ("md", "level", "content")
+    RECORD_TAG = "h"
+
     def __init__(self, line: str):
         self.md = line
         self.level = line.split(' ')[0].count('#')
         self.content = line.replace('#', '').strip()
 
 
-@dataclass
+@dataclass(slots=True)
 class Req():
     id: str
     content: str
     req_trace_ids: list[str]
     raw_metadata: str
+    signals: set[str] = field(default_factory=set)
+    mod_signals: set[str] = field(default_factory=set)
+    _content_lines: list[str] = field(default_factory=list, repr=False, compare=False)
 
-    CUSTOM_STYLE_PATTERN = r'\[([\w: ]+)]\{custom-style="([\w ]+)"\}'
+    CUSTOM_STYLE_PATTERN = re.compile(r'\[([\w: ]+)]\{custom-style="([\w ]+)"\}')
+    RECORD_TAG = "r"
 
     def __init__(self, meta_line: str):
         self.raw_metadata = meta_line
@@ -76,25 +146,29 @@ class Req():
 
         self.id = req_id.strip()
         self.content = ""
+        self.signals = set()
+        self.mod_signals = set()
+        self._content_lines = []
 
     def add_content_line(self, line: str):
-        self.content += line
+        self._content_lines.append(line)
 
-    @property
-    def signals(self):
-        matches = re.findall(Req.CUSTOM_STYLE_PATTERN, self.content)
-        signals = [match[0] for match in matches
-                   if 'Signal' in match[1].split(' ')]
-        signals = set(signals)  # Keep unique
-        return signals
-    
-    @property
-    def mod_signals(self):
-        matches = re.findall(Req.CUSTOM_STYLE_PATTERN, self.content)
-        signals = [match[0] for match in matches
-                   if 'ModSignal' in match[1].split(' ')]
-        signals = set(signals)  # Keep unique
-        return signals
+    def finalize(self):
+        self.content = ''.join(self._content_lines).strip()
+        self._content_lines = []
+
+        for name, styles in Req.CUSTOM_STYLE_PATTERN.findall(self.content):
+            styles = styles.split(' ')
+            if 'Signal' in styles:
+                self.signals.add(name)
+            if 'ModSignal' in styles:
+                self.mod_signals.add(name)
+
+    def meta_line(self) -> str:
+        """The metadata line for this ID and traces, as converted docs have it."""
+        if self.req_trace_ids:
+            return f"\\[{self.id} → {', '.join(self.req_trace_ids)}\\]\n"
+        return f"\\[{self.id}\\]\n"
 
 
 def is_heading(line: str):
@@ -109,89 +183,88 @@ def is_blank(line: str):
     return line.strip() == ''
 
 
-def is_end(line: str):
-    return line == '<EOT>'
-
-
 class ParseState(Enum):
     NONE = 0
     HEADING = 1
     REQ_META = 2
     REQ = 3
-    END = 4
+
+
+def plain_text(contents: str) -> str:
+    """Requirement contents without custom style markup."""
+    return Req.CUSTOM_STYLE_PATTERN.sub(r'\1', contents)
 
 
 def parse_file(filename) -> Spec:
     with open(filename, encoding='utf8') as md_file:
-        spec = parse_lines(md_file.readlines())
+        spec = parse_lines(md_file)
         spec.filename = filename
         return spec
 
 
-def parse_lines(lines):
-    lines += ['<EOT>']
-    lines = remove_fenced_styles(lines)
+def parse_lines(lines) -> Spec:
     spec = Spec()
-    state = ParseState.NONE
+    for block in iter_blocks(lines):
+        spec.add_block(block)
+    return spec
+
+
+def next_state(state: ParseState, line: str, prev_line: str) -> ParseState:
+    if state == ParseState.NONE:
+        if is_req_meta(line):
+            return ParseState.REQ_META
+        elif is_heading(line):
+            return ParseState.HEADING
+        else:
+            return ParseState.NONE
+    elif state == ParseState.HEADING:
+        if is_heading(line):
+            return ParseState.HEADING
+        else:
+            return ParseState.NONE
+    elif state == ParseState.REQ_META:
+        if is_heading(line):
+            return ParseState.HEADING
+        elif is_req_meta(line):
+            return ParseState.REQ_META
+        else:
+            return ParseState.REQ
+    elif state == ParseState.REQ:
+        if is_heading(line):
+            return ParseState.HEADING
+        elif is_req_meta(line) and is_blank(prev_line):
+            # A blank line must preceed the start of a new requirement
+            return ParseState.REQ_META
+        else:
+            return ParseState.REQ
 
+
+def iter_blocks(lines):
+    """Yield Heading and Req blocks from an iterable of markdown lines."""
+    state = ParseState.NONE
     current_req = None
+    prev_line = ''
 
-    for i, line in enumerate(lines):
-        # Update state
-        if state == ParseState.NONE:
-            if is_req_meta(line):
-                state = ParseState.REQ_META
-            elif is_heading(line):
-                state = ParseState.HEADING
-            elif is_end(line):
-                state = ParseState.END
-            else:
-                state = ParseState.NONE
-        elif state == ParseState.HEADING:
-            if is_blank(line):
-                state = ParseState.NONE
-            if is_heading(line):
-                state = ParseState.HEADING
-            elif is_end(line):
-                state = ParseState.END
-            else:
-                state = ParseState.NONE
-        elif state == ParseState.REQ_META:
-            if is_heading(line):
-                state = ParseState.HEADING
-            elif is_req_meta(line):
-                state = ParseState.REQ_META
-            elif is_end(line):
-                state = ParseState.END
-            else:
-                state = ParseState.REQ
-        elif state == ParseState.REQ:
-            if is_heading(line):
-                state = ParseState.HEADING
-            elif is_req_meta(line) and is_blank(lines[i - 1]):
-                # A blank line must preceed the start of a new requirement
-                state = ParseState.REQ_META
-            elif is_end(line):
-                state = ParseState.END
-            else:
-                state = ParseState.REQ
+    for line in remove_fenced_styles(lines):
+        state = next_state(state, line, prev_line)
+        prev_line = line
 
-        # Process line
         if state != ParseState.REQ and current_req:
-            current_req.content = current_req.content.strip()
-            spec.add_block(current_req)
+            current_req.finalize()
+            yield current_req
             current_req = None
 
         if state == ParseState.HEADING:
-            spec.add_block(Heading(line))
+            yield Heading(line)
         elif state == ParseState.REQ_META:
             current_req = Req(line)
         elif state == ParseState.REQ:
             current_req.add_content_line(line)
 
-    return spec
+    if current_req:
+        current_req.finalize()
+        yield current_req
 
 
 def remove_fenced_styles(lines):
-    lines = [line for line in lines if line[0:3] != ':::']
-    return lines
+    return (line for line in lines if line[0:3] != ':::')
@@ -0,0 +1,141 @@
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+from .md_spec import plain_text
+
+
+# Requirements are compared as sets of overlapping word triples.
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+
+# Buckets with more members than this pair each one with the first member
+# only, so boilerplate repeated thousands of times stays linear.
+MAX_BUCKET_PAIRS = 20
+
+# How far below the threshold pairs start to become LSH candidates.
+RECALL_MARGIN = 0.1
+
+# Texts are joined with a character that is never part of a word.
+SEPARATOR = '\x00'
+TOKEN_PATTERN = re.compile(r'\w+|\x00')
+MASK_32 = np.uint64(0xFFFFFFFF)
+
+
+def band_rows(threshold: float) -> int:
+    """Rows per LSH band.
+
+    Texts become candidates from a similarity of about (1 / bands) ** (1 / rows).
+    That is aimed a little below threshold, so pairs just above it are rarely
+    missed, and the extra candidates are dropped by the similarity check.
+    """
+    target = threshold - RECALL_MARGIN
+    rows = [r for r in range(1, NUM_PERM + 1)
+            if (1 / (NUM_PERM // r)) ** (1 / r) <= target]
+    return max(rows, default=1)
+
+
+def shingle_hashes(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """32 bit hash of each shingle, and the index of the text it came from.
+
+    All texts are tokenized as one string and words are hashed once per
+    distinct word, so Python never loops over individual shingles.
+    """
+    joined = plain_text(SEPARATOR.join(texts)).lower()
+    codes, uniques = pd.factorize(
+        pd.Series(TOKEN_PATTERN.findall(joined + SEPARATOR), dtype=object))
+
+    is_separator = codes == uniques.get_loc(SEPARATOR)
+    owners = np.cumsum(is_separator)[~is_separator]
+    word_hashes = np.array([zlib.crc32(word.encode('utf8')) for word in uniques],
+                           dtype=np.uint64)[codes[~is_separator]]
+
+    # A shingle starts at each word followed by SHINGLE_SIZE - 1 words of the same text.
+    n = len(word_hashes) - SHINGLE_SIZE + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    valid = owners[:n] == owners[SHINGLE_SIZE - 1:]
+
+    hashes = np.zeros(n, dtype=np.uint64)
+    for offset in range(SHINGLE_SIZE):
+        hashes = hashes * np.uint64(0x100000001B3) + word_hashes[offset:offset + n]
+    hashes = (hashes ^ (hashes >> np.uint64(32))) & MASK_32
+
+    return hashes[valid], owners[:n][valid]
+
+
+def signatures(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """MinHash signatures of texts, and which texts have any shingles."""
+    hashes, owners = shingle_hashes(texts)
+    has_shingles = np.zeros(len(texts), dtype=bool)
+    has_shingles[owners] = True
+    starts = np.flatnonzero(np.concatenate([[True], owners[1:] != owners[:-1]])) \
+        if len(owners) else np.zeros(0, dtype=np.int64)
+
+    # Fixed seed so results, and so cached lints, are the same every run.
+    rng = np.random.default_rng(0)
+    a = rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+
+    sigs = np.zeros((len(texts), NUM_PERM), dtype=np.uint32)
+    if len(hashes) == 0:
+        return sigs, has_shingles
+
+    minimums = np.empty((NUM_PERM, len(starts)), dtype=np.uint64)
+    for perm in range(NUM_PERM):
+        # Multiply-shift hashing, relying on uint64 arithmetic wrapping.
+        permuted = (a[perm] * hashes + b[perm]) >> np.uint64(32)
+        minimums[perm] = np.minimum.reduceat(permuted, starts)
+    sigs[has_shingles] = minimums.T
+
+    return sigs, has_shingles
+
+
+def bucket_pairs(keys: np.ndarray) -> np.ndarray:
+    """(i, j) pairs, i < j, of rows with equal keys."""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]]))
+    sizes = np.diff(np.append(starts, len(keys)))
+
+    pairs = []
+    # Most buckets hold one text, so only visit the shared ones.
+    for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+        bucket = order[start:start + size]
+        if len(bucket) <= MAX_BUCKET_PAIRS:
+            i, j = np.triu_indices(len(bucket), k=1)
+            pairs.append(np.stack([bucket[i], bucket[j]], axis=1))
+        else:
+            pairs.append(np.stack([np.full(len(bucket) - 1, bucket[0]), bucket[1:]], axis=1))
+
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.concatenate(pairs)
+
+
+def near_duplicate_pairs(texts: list[str], threshold: float) -> np.ndarray:
+    """(i, j) index pairs of texts whose estimated similarity reaches threshold.
+
+    Only texts sharing an LSH bucket are compared, so the work grows roughly
+    linearly with the number of texts.
+    """
+    sigs, has_shingles = signatures(texts)
+    rows = band_rows(threshold)
+    candidates = np.flatnonzero(has_shingles)
+    band_sigs = sigs[candidates]
+
+    pairs = []
+    for start in range(0, NUM_PERM // rows * rows, rows):
+        # Fold the band into one integer key. A collision only adds a
+        # candidate, which the similarity check below drops again.
+        keys = np.zeros(len(band_sigs), dtype=np.uint64)
+        for column in band_sigs[:, start:start + rows].T:
+            keys = keys * np.uint64(0x100000001B3) + column
+        pairs.append(candidates[bucket_pairs(keys)])
+
+    # Buckets list members in index order, so each pair is already (low, high).
+    pairs = np.unique(np.concatenate(pairs), axis=0)
+
+    similarity = (sigs[pairs[:, 0]] == sigs[pairs[:, 1]]).mean(axis=1)
+    return pairs[similarity >= threshold]
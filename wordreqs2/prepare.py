@@ -1,55 +1,329 @@
 import shutil
 import os
-from pathlib import Path
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from multiprocessing import Pool
+from importlib import metadata
+from typing import Iterator, Optional
 
 from wordreqs2.config import DocConfig
-from .docx_to_md import word_to_md, newline_after_meta
+from .docx_to_md import pandoc_version
+from .transforms import apply_transforms, as_bytes
+from .cache import TMP_DIR, file_digest, key_digest, read_json, write_json, write_bytes
+from .profiling import record
+from .shared_cache import SHARED_CACHE
+
+
+# Bump when transform output changes so cached conversions are discarded.
+MANIFEST_VERSION = 1
+MANIFEST_FILENAME = TMP_DIR / "manifest.json"
+
+
+def is_current_copy(src: str, dst: str) -> bool:
+    """Whether dst already holds the contents of src.
+
+    Size and mtime decide most cases. Copies keep the source mtime, so when
+    only the mtime differs the contents are hashed to check.
+    """
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
 
+    if file_digest(src) != file_digest(dst):
+        return False
+    # Same contents, e.g. touched or restored, so skip the hash next time.
+    os.utime(dst, ns=(dst_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
 
-def copy_docs(doc_configs: dict[str, DocConfig]):
+
+def copy_with_xcopy(src: str, dst: str):
     # Using shutil copy gets permissions denied if the file is open.
     # Using Windows' xcopy is a workaround.
     # Also, xcopy doesn't always seem to have the /-I flag, so a file
     # is made manually first, so it doesn't prompt if the dst is a
     # file or folder.
-    for doc_id, doc_config in doc_configs.items():
-        if doc_config.import_from is not None:
-            src = doc_config.import_from
-            dst = doc_config.file
-
-            if not os.path.exists(dst):
-                with open(dst, "w"):
-                    pass
-
-            suppress_overwrite_prompt = "/Y"
-            hide_file_names = "/Q"
-            subprocess.run(
-                [
-                    "xcopy", src, dst, hide_file_names, suppress_overwrite_prompt,
-                ],
-                stdout=subprocess.DEVNULL, shell=True
-            )
-            print(f"🚚 Imported {doc_id} to project")
-
-
-def run_transforms(doc_id: str, filename: str, transforms: list):
-    Path("tmp").mkdir(exist_ok=True)
-    md_filename = f"tmp/{doc_id}.md"
-    shutil.copy(filename, md_filename)
-
-    for transform in transforms:
-        if transform == "docx-to-md":
-            word_to_md(md_filename, md_filename)
-        elif transform == "newline-after-meta":
-            newline_after_meta(md_filename, md_filename)
+    if not os.path.exists(dst):
+        with open(dst, "w"):
+            pass
+
+    suppress_overwrite_prompt = "/Y"
+    hide_file_names = "/Q"
+    subprocess.run(
+        [
+            "xcopy", src, dst, hide_file_names, suppress_overwrite_prompt,
+        ],
+        stdout=subprocess.DEVNULL, shell=True, check=True
+    )
+
+
+def copy_file(src: str, dst: str):
+    """Copy src over dst through a temp file, so dst is never half written."""
+    dst_path = Path(dst)
+    tmp_path = dst_path.with_name(f"{dst_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        before = os.stat(src)
+        shutil.copyfile(src, tmp_path)
+        shutil.copystat(src, tmp_path)
+        after = os.stat(src)
+        if (before.st_size, before.st_mtime_ns) != (after.st_size, after.st_mtime_ns):
+            raise OSError(f"{src} changed while it was being copied")
+        os.replace(tmp_path, dst_path)
+    except PermissionError:
+        if os.name != "nt":
+            raise
+        copy_with_xcopy(src, dst)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def import_doc(doc_config: DocConfig) -> tuple[bool, float]:
+    """Copy import_from to file if it changed, returning whether it was copied."""
+    start = time.perf_counter()
+    if is_current_copy(doc_config.import_from, doc_config.file):
+        return False, time.perf_counter() - start
+
+    copy_file(doc_config.import_from, doc_config.file)
+    return True, time.perf_counter() - start
+
 
+def copy_docs(doc_configs: dict[str, DocConfig], workers: Optional[int] = None):
+    """Bring each document's file up to date with its import_from source.
+
+    Sources are often on slow network shares, so the files are checked and
+    copied in parallel threads.
+    """
+    imports = {doc_id: doc_config for doc_id, doc_config in doc_configs.items()
+               if doc_config.import_from is not None}
+    if not imports:
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {doc_id: executor.submit(import_doc, doc_config)
+                   for doc_id, doc_config in imports.items()}
+
+        for doc_id, future in futures.items():
+            try:
+                copied, seconds = future.result()
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"❌ Could not import {doc_id}: {e}")
+                continue
+
+            # Threads can't add spans themselves, so record what they timed.
+            record(f"copy {doc_id}", seconds)
+            if copied:
+                print(f"🚚 Imported {doc_id} to project")
+
+
+def run_transforms(doc_id: str, filename: str, transforms: list,
+                   md_filename=None) -> list[tuple[str, float]]:
+    """Convert filename to tmp/<doc_id>.md, or md_filename, returning the time
+    each transform took.
+
+    The transforms pass the document along in memory and only the result is
+    written.
+    """
+    with open(filename, "rb") as f:
+        content = f.read()
+
+    timings = []
+
+    def done(transform: str, seconds: float):
+        timings.append((transform, seconds))
         print(f"🔧 Transformed {doc_id} by {transform}")
 
+    content = apply_transforms(content, transforms, done)
+    write_bytes(md_filename or TMP_DIR / f"{doc_id}.md", as_bytes(content))
+    return timings
+
+
+def tool_versions(transforms: list[str]) -> dict:
+    try:
+        wreqs_version = metadata.version("word-reqs-2")
+    except metadata.PackageNotFoundError:
+        wreqs_version = None
+
+    versions = {"manifest": MANIFEST_VERSION, "wreqs": wreqs_version}
+
+    if "docx-to-md" in transforms:
+        versions["pandoc"] = pandoc_version()
+
+    return versions
+
+
+def transform_key(filename: str, transforms: list[str]) -> str:
+    return key_digest(file_digest(filename), transforms, tool_versions(transforms))
+
+
+class Manifest:
+    """Record of which source contents produced each tmp/<doc_id>.md."""
+
+    def __init__(self, docs: dict[str, dict]):
+        self.docs = docs
+
+    @classmethod
+    def load(cls, filename=MANIFEST_FILENAME) -> "Manifest":
+        data = read_json(filename, default={})
+        if data.get("version") != MANIFEST_VERSION:
+            return cls({})
+        return cls(data["docs"])
+
+    def save(self, filename=MANIFEST_FILENAME):
+        write_json(filename, {"version": MANIFEST_VERSION, "docs": self.docs})
+
+    def is_current(self, doc_id: str, key: str) -> bool:
+        entry = self.docs.get(doc_id)
+        if entry is None or entry["key"] != key:
+            return False
+
+        # Guard against the output being deleted or edited by hand.
+        md_filename = TMP_DIR / f"{doc_id}.md"
+        return md_filename.exists() and file_digest(md_filename) == entry["md_digest"]
+
+    def record(self, doc_id: str, key: str):
+        self.docs[doc_id] = {
+            "key": key,
+            "md_digest": file_digest(TMP_DIR / f"{doc_id}.md"),
+        }
+
+
+def worker_count(workers: Optional[int] = None) -> int:
+    """Workers from wreqs.toml, or the CPUs this process may run on."""
+    if workers is not None:
+        return max(1, workers)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def source_size(filename: str) -> int:
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+
+def run_transforms_job(args: tuple) -> tuple[str, list[tuple[str, float]]]:
+    return args[0], run_transforms(*args)
+
+
+def conversion_jobs(doc_configs: dict[str, DocConfig]) -> dict[str, tuple[str, str, list[str]]]:
+    """Document, absolute source path and transforms of each conversion that
+    is out of date, by transform key."""
+    manifest = Manifest.load()
+    keys = {doc_id: transform_key(doc_config.file, doc_config.transforms)
+            for doc_id, doc_config in doc_configs.items()}
+    current = {key for doc_id, key in keys.items() if manifest.is_current(doc_id, key)}
+
+    jobs = {}
+    for doc_id, key in keys.items():
+        if key not in current:
+            doc_config = doc_configs[doc_id]
+            jobs.setdefault(key, (doc_id, os.path.abspath(doc_config.file),
+                                  doc_config.transforms))
+    return jobs
+
+
+def iter_prepare(doc_configs: dict[str, DocConfig], workers: Optional[int] = None,
+                 pool: Optional[Pool] = None) -> Iterator[str]:
+    """Bring tmp/<doc_id>.md up to date, yielding each doc_id once it is ready.
+
+    Up to date documents are yielded first, then those found in the shared
+    cache, then converted ones in the order they finish, so the caller can
+    parse them while the rest convert. Conversions run on pool if one is
+    given, and it is left running.
+    """
+    manifest = Manifest.load()
+    keys = {doc_id: transform_key(doc_config.file, doc_config.transforms)
+            for doc_id, doc_config in doc_configs.items()}
+
+    # Docs that share a source and transform chain are converted once.
+    current = {}
+    stale = {}
+    up_to_date = []
+    for doc_id, key in keys.items():
+        if manifest.is_current(doc_id, key):
+            current.setdefault(key, doc_id)
+            up_to_date.append(doc_id)
+            print(f"✅ {doc_id} is up to date")
+        else:
+            stale.setdefault(key, []).append(doc_id)
+
+    shared = {key: doc_ids[0] for key, doc_ids in stale.items()
+              if key not in current and SHARED_CACHE.has_conversion(key)}
+    to_convert = {key: doc_ids for key, doc_ids in stale.items()
+                  if key not in current and key not in shared}
+
+    # The largest documents take longest, so start them first. Paths are
+    # absolute since a shared pool's workers may run in another folder.
+    args = sorted(((doc_ids[0], os.path.abspath(doc_configs[doc_ids[0]].file),
+                    doc_configs[doc_ids[0]].transforms,
+                    os.path.abspath(TMP_DIR / f"{doc_ids[0]}.md"))
+                   for doc_ids in to_convert.values()),
+                  key=lambda job: source_size(job[1]), reverse=True)
+
+    own_pool = None
+    if pool is not None and args:
+        results = pool.imap_unordered(run_transforms_job, args)
+    elif len(args) == 1:
+        # Not worth starting a pool, e.g. when watching a single document.
+        results = map(run_transforms_job, args)
+    elif args:
+        own_pool = Pool(min(worker_count(workers), len(args)))
+        results = own_pool.imap_unordered(run_transforms_job, args)
+    else:
+        results = iter([])
+
+    try:
+        yield from up_to_date
+        for key, doc_ids in stale.items():
+            if key in current:
+                yield from reuse_conversion(manifest, current[key], key, doc_ids)
+            elif key in shared:
+                SHARED_CACHE.get_conversion(key, TMP_DIR / f"{shared[key]}.md")
+                manifest.record(shared[key], key)
+                print(f"📦 Reused shared conversion for {shared[key]}")
+                yield shared[key]
+                yield from reuse_conversion(manifest, shared[key], key, doc_ids)
+
+        for doc_id, timings in results:
+            # Workers can't add spans themselves, so record what they timed.
+            for transform, seconds in timings:
+                record(f"{transform} {doc_id}", seconds)
+
+            key = keys[doc_id]
+            manifest.record(doc_id, key)
+            SHARED_CACHE.put_conversion(key, TMP_DIR / f"{doc_id}.md")
+            yield doc_id
+            yield from reuse_conversion(manifest, doc_id, key, stale[key])
+    finally:
+        if own_pool is not None:
+            own_pool.terminate()
+            own_pool.join()
+        manifest.save()
+
+
+def reuse_conversion(manifest: Manifest, src_doc_id: str, key: str,
+                     doc_ids: list[str]) -> Iterator[str]:
+    for doc_id in doc_ids:
+        if doc_id == src_doc_id:
+            continue
+        shutil.copy(TMP_DIR / f"{src_doc_id}.md", TMP_DIR / f"{doc_id}.md")
+        manifest.record(doc_id, key)
+        print(f"📋 Reused {src_doc_id} conversion for {doc_id}")
+        yield doc_id
+
 
-def run_prepare(doc_configs: dict[str, DocConfig]):
-    with Pool(4) as p:
-        args = [(doc_id, doc_config.file, doc_config.transforms)
-                for doc_id, doc_config in doc_configs.items()]
-        p.starmap(run_transforms, args)
\ No newline at end of file
+def run_prepare(doc_configs: dict[str, DocConfig], workers: Optional[int] = None):
+    for _ in iter_prepare(doc_configs, workers):
+        pass
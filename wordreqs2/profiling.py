@@ -0,0 +1,131 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+
+@dataclass
+class Span:
+    name: str
+    depth: int
+    seconds: float = 0.0
+    peak_bytes: int = 0
+    children: list["Span"] = field(default_factory=list)
+
+
+class Profiler:
+    """Nested timed spans, optionally with the peak traced memory inside each.
+
+    Disabled by default, so instrumented code pays only for a function call.
+    Tracing memory slows everything down several times over, so it is only
+    done when asked for, and the times are then only good for comparing
+    stages with each other.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.root = Span("total", 0)
+        self.stack = [self.root]
+        self.start_time = 0.0
+
+    def start(self, memory=False):
+        self.enabled = True
+        self.memory = memory
+        self.root = Span("total", 0)
+        self.stack = [self.root]
+        self.start_time = time.perf_counter()
+        if memory:
+            tracemalloc.start()
+
+    def stop(self):
+        self.fold_peak(self.root)
+        self.root.seconds = time.perf_counter() - self.start_time
+        if self.memory:
+            tracemalloc.stop()
+        self.enabled = False
+
+    def fold_peak(self, span: Span):
+        if self.memory:
+            span.peak_bytes = max(span.peak_bytes, tracemalloc.get_traced_memory()[1])
+
+    @contextmanager
+    def span(self, name: str):
+        parent = self.stack[-1]
+        # The peak is reset per span, so keep the parent's peak so far first.
+        self.fold_peak(parent)
+        if self.memory:
+            tracemalloc.reset_peak()
+
+        span = Span(name, parent.depth + 1)
+        parent.children.append(span)
+        self.stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - start
+            self.fold_peak(span)
+            self.stack.pop()
+            parent.peak_bytes = max(parent.peak_bytes, span.peak_bytes)
+
+    def add(self, name: str, seconds: float):
+        """Record a span timed elsewhere, e.g. in a worker process."""
+        parent = self.stack[-1]
+        parent.children.append(Span(name, parent.depth + 1, seconds))
+
+    def spans(self) -> list[Span]:
+        """All spans in tree order."""
+        spans = []
+        pending = [self.root]
+        while pending:
+            span = pending.pop()
+            spans.append(span)
+            pending.extend(reversed(span.children))
+        return spans
+
+    def print_table(self):
+        from rich.console import Console
+        from rich.table import Table
+
+        total = self.root.seconds or 1.0
+
+        table = Table(title="Profile")
+        table.add_column("Stage")
+        table.add_column("Seconds", justify="right")
+        table.add_column("%", justify="right")
+        if self.memory:
+            table.add_column("Peak MB", justify="right")
+
+        for span in self.spans():
+            row = [
+                "  " * span.depth + span.name,
+                f"{span.seconds:.3f}",
+                f"{100 * span.seconds / total:.1f}",
+            ]
+            if self.memory:
+                row.append(f"{span.peak_bytes / 1e6:.1f}" if span.peak_bytes else "")
+            table.add_row(*row)
+
+        Console().print(table)
+
+    def write_json(self, filename):
+        with open(filename, "w", encoding="utf8") as f:
+            json.dump(asdict(self.root), f, indent=2)
+
+
+PROFILER = Profiler()
+
+
+def span(name: str):
+    """Time the enclosed block as a stage when profiling is enabled."""
+    if not PROFILER.enabled:
+        return nullcontext()
+    return PROFILER.span(name)
+
+
+def record(name: str, seconds: Optional[float]):
+    if PROFILER.enabled and seconds is not None:
+        PROFILER.add(name, seconds)
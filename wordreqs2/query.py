@@ -0,0 +1,58 @@
+from typing import Optional
+from rich.console import Console
+from rich.table import Table
+
+from wordreqs2.config import ProjConfig
+from .store import ReqStore
+
+
+QUERIES = {
+    "req": (ReqStore.req, "Requirement {}"),
+    "children": (ReqStore.children, "Children of {}"),
+    "parents": (ReqStore.parents, "Parents of {}"),
+    "setters": (ReqStore.setters, "Setters of signal \"{}\""),
+    "readers": (ReqStore.readers, "Readers of signal \"{}\""),
+}
+
+
+def run_query(store: ReqStore, terms: list[str],
+              docs_filter: Optional[list[str]] = None):
+    console = Console(soft_wrap=True, highlight=False)
+
+    if len(terms) != 2 or terms[0] not in QUERIES:
+        console.print(f"Usage: wreqs query {{{','.join(QUERIES)}}} <req ID or signal>")
+        return
+
+    kind, arg = terms
+    query, title = QUERIES[kind]
+    print_rows(console, title.format(arg), query(store, arg, docs_filter))
+
+
+def print_rows(console: Console, title: str, rows):
+    table = Table(title=title)
+    table.add_column("Doc ID", no_wrap=True)
+    table.add_column("Req ID", no_wrap=True)
+    table.add_column("Contents")
+
+    for row in rows:
+        table.add_row(row["doc_id"], row["req_id"], row["contents"].split("\n")[0])
+
+    console.print(table)
+
+
+def run_search(store: ReqStore, config: ProjConfig, terms: list[str],
+               docs_filter: Optional[list[str]] = None):
+    console = Console(soft_wrap=True, highlight=False)
+
+    if not terms:
+        console.print("Usage: wreqs search <term> [\"a phrase\"] [prefix*] ...")
+        return
+    if not store.has_text:
+        console.print("❌ Search needs SQLite with FTS5, which this Python's sqlite3 lacks.")
+        return
+
+    # Documents in config order, requirements in document order.
+    doc_order = {doc_id: i for i, doc_id in enumerate(config.docs)}
+    rows = sorted(store.search(terms, docs_filter),
+                  key=lambda row: doc_order.get(row["doc_id"], 0))
+    print_rows(console, f"Requirements matching {' '.join(terms)}", rows)
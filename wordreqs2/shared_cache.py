@@ -0,0 +1,99 @@
+import copy
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from .md_spec import Spec
+from .cache import key_digest, write_copy
+
+
+# Parsed specs kept in memory. The least recently used are dropped first.
+MAX_MEMORY_SPECS = 16
+
+
+class SharedCache:
+    """Conversions and parsed specs shared between projects, keyed by content.
+
+    Projects run together often include the same document, e.g. a system
+    spec, which is then converted and parsed only once. Disabled until a
+    folder is given with enable().
+    """
+
+    def __init__(self):
+        self.root: Optional[Path] = None
+        self.specs: OrderedDict[str, Spec] = OrderedDict()
+
+    def enable(self, root):
+        self.root = Path(root).resolve()
+        self.specs.clear()
+
+    def disable(self):
+        self.root = None
+        self.specs.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.root is not None
+
+    def conversion_path(self, key: str) -> Path:
+        return self.root / "md" / f"{key}.md"
+
+    def has_conversion(self, key: str) -> bool:
+        return self.enabled and self.conversion_path(key).exists()
+
+    def get_conversion(self, key: str, md_filename):
+        """Copy the shared conversion for key to md_filename."""
+        write_copy(self.conversion_path(key), md_filename)
+
+    def put_conversion(self, key: str, md_filename):
+        if self.enabled:
+            write_copy(md_filename, self.conversion_path(key))
+
+    def spec_path(self, key: list) -> Path:
+        return self.root / "specs" / f"{key_digest(key)}.spec"
+
+    def get_spec(self, key: list, cache_filename) -> Optional[Spec]:
+        """Spec for key from memory, copying its cache file to cache_filename.
+
+        Specs are shared, so callers get a shallow copy to set the filename on.
+        """
+        if not self.enabled:
+            return None
+
+        digest = key_digest(key)
+        spec = self.specs.get(digest)
+        if spec is None or not self.spec_path(key).exists():
+            return None
+
+        self.specs.move_to_end(digest)
+        write_copy(self.spec_path(key), cache_filename)
+        return copy.copy(spec)
+
+    def get_spec_file(self, key: list, cache_filename) -> bool:
+        """Copy the shared cache file for key to cache_filename, if there is one."""
+        if not self.enabled or not self.spec_path(key).exists():
+            return False
+        write_copy(self.spec_path(key), cache_filename)
+        return True
+
+    def drop_spec_file(self, key: list):
+        """Remove the shared cache file for key, e.g. one that fails to load."""
+        if self.enabled:
+            self.spec_path(key).unlink(missing_ok=True)
+
+    def put_spec(self, key: list, spec: Spec, cache_filename):
+        """Remember spec, and share the cache file just written for it."""
+        if not self.enabled:
+            return
+
+        path = self.spec_path(key)
+        if not path.exists():
+            write_copy(cache_filename, path)
+
+        self.specs[key_digest(key)] = spec
+        self.specs.move_to_end(key_digest(key))
+        while len(self.specs) > MAX_MEMORY_SPECS:
+            self.specs.popitem(last=False)
+
+
+SHARED_CACHE = SharedCache()
@@ -0,0 +1,90 @@
+from typing import Optional
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from wordreqs2.config import ProjConfig
+
+
+DocReqs = dict[str, list[str]]  # doc_id -> req_ids
+
+
+class SignalIndex:
+    """Which signals are set and read, and by which requirements.
+
+    The name sets are all lints need, so the per-requirement lists are only
+    built when first asked for.
+    """
+
+    def __init__(self, signals):
+        self.signals = signals
+        modified = signals.modified.to_numpy(dtype=bool)
+        self.set_names = set(signals["name"][modified].unique())
+        self.read_names = set(signals["name"][~modified].unique())
+        self._refs = None
+
+    def refs(self) -> tuple[dict[str, DocReqs], dict[str, DocReqs]]:
+        if self._refs is None:
+            setters, readers = {}, {}
+            signals = self.signals
+            for name, modified, doc_id, req_id in zip(
+                    signals["name"], signals.modified, signals.doc_id, signals.req_id):
+                index = setters if modified else readers
+                index.setdefault(name, {}).setdefault(doc_id, []).append(req_id)
+            self._refs = (setters, readers)
+        return self._refs
+
+    def setters(self, name: str) -> DocReqs:
+        return self.refs()[0].get(name, {})
+
+    def readers(self, name: str) -> DocReqs:
+        return self.refs()[1].get(name, {})
+
+    def names(self) -> list[str]:
+        return sorted(self.set_names | self.read_names)
+
+
+def is_external_signal(signals, doc_signals: dict[str, list[str]]):
+    """Mask of signal rows listed for their document in doc_signals."""
+    mask = np.zeros(len(signals), dtype=bool)
+    for doc_id, names in doc_signals.items():
+        if names:
+            mask |= ((signals.doc_id == doc_id) & signals["name"].isin(names)).to_numpy()
+    return mask
+
+
+def external_docs(name: str, doc_signals: dict[str, list[str]]) -> list[str]:
+    """Documents that list name as an input or output."""
+    return [doc_id for doc_id, names in doc_signals.items() if name in names]
+
+
+def format_refs(doc_reqs: DocReqs, external: list[str],
+                docs_filter: list[str], label: str) -> str:
+    lines = [f"{doc_id}: {', '.join(req_ids)}" for doc_id, req_ids in doc_reqs.items()
+             if doc_id in docs_filter]
+    lines += [f"{doc_id} ({label})" for doc_id in external if doc_id in docs_filter]
+    return "\n".join(lines)
+
+
+def run_signals(index: SignalIndex, config: ProjConfig, names: list[str],
+                docs_filter: Optional[list[str]] = None):
+    docs_filter = docs_filter or list(config.docs.keys())
+    inputs = {doc_id: doc_config.inputs for doc_id, doc_config in config.docs.items()}
+    outputs = {doc_id: doc_config.outputs for doc_id, doc_config in config.docs.items()}
+
+    table = Table(title="Signals")
+    table.add_column("Signal", no_wrap=True)
+    table.add_column("Set by")
+    table.add_column("Read by")
+
+    for name in names or index.names():
+        set_by = format_refs(index.setters(name), external_docs(name, inputs),
+                             docs_filter, "input")
+        read_by = format_refs(index.readers(name), external_docs(name, outputs),
+                              docs_filter, "output")
+        if set_by or read_by or names:
+            table.add_row(name, set_by, read_by)
+            table.add_section()
+
+    console = Console(highlight=False)
+    console.print(table)
@@ -0,0 +1,224 @@
+import gc
+import marshal
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Optional
+
+from wordreqs2.config import DocConfig
+from . import md_spec
+from .md_spec import Spec
+from .cache import TMP_DIR, file_digest, read_json, write_bytes, write_json
+from .profiling import span
+from .shared_cache import SHARED_CACHE
+
+
+# Bump when the summary fields or how they are counted change.
+SUMMARY_VERSION = 2
+# Bump when the spec cache file format changes.
+SPEC_CACHE_VERSION = 1
+
+
+def int_or_default(x: str, default: int):
+    try:
+        return int(x)
+    except ValueError:
+        return default
+
+
+@dataclass
+class DocSummary:
+    """Counts status needs, kept beside each spec so it can skip parsing."""
+    count: int = 0
+    deleted: int = 0
+    max_num: Optional[int] = None
+    malformed: int = 0
+
+    @classmethod
+    def from_spec(cls, spec: Spec, doc_config: DocConfig) -> "DocSummary":
+        prefix = doc_config.req_id_prefix
+        summary = cls()
+        for req in spec.reqs:
+            summary.count += 1
+            if doc_config.deleted is not None and req.content == doc_config.deleted:
+                summary.deleted += 1
+            if not (req.id.startswith(prefix) and req.id[len(prefix):].isdigit()):
+                summary.malformed += 1
+
+            num = int_or_default(req.id.replace(prefix, ""), 0)
+            if summary.max_num is None or num > summary.max_num:
+                summary.max_num = num
+        return summary
+
+    def next_id(self, prefix: str) -> str:
+        return prefix + str((self.max_num or 0) + 1)
+
+
+def summary_filename(doc_id: str):
+    return TMP_DIR / f"{doc_id}.summary.json"
+
+
+def summary_key(doc_config: DocConfig) -> list:
+    return [SUMMARY_VERSION, doc_config.req_id_prefix, doc_config.deleted]
+
+
+def md_stat(doc_id: str) -> list[int]:
+    stat = os.stat(TMP_DIR / f"{doc_id}.md")
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_summary(doc_config: DocConfig, spec: Spec) -> DocSummary:
+    summary = DocSummary.from_spec(spec, doc_config)
+    write_json(summary_filename(doc_config.doc_id),
+               {"key": summary_key(doc_config), "digest": spec.digest,
+                "stat": md_stat(doc_config.doc_id), "summary": asdict(summary)})
+    return summary
+
+
+def get_summary(doc_config: DocConfig) -> DocSummary:
+    """Read the summary of a document, parsing it only if the summary is stale.
+
+    The markdown is only hashed when its size or mtime changed since the
+    summary was written, so status stays quick however large the spec.
+    """
+    doc_id = doc_config.doc_id
+    cached = read_json(summary_filename(doc_id))
+    if cached is not None and cached["key"] == summary_key(doc_config):
+        stat = md_stat(doc_id)
+        if cached["stat"] == stat:
+            return DocSummary(**cached["summary"])
+        if cached["digest"] == file_digest(TMP_DIR / f"{doc_id}.md"):
+            # Same contents, e.g. converted again, so skip the hash next time.
+            cached["stat"] = stat
+            write_json(summary_filename(doc_id), cached)
+            return DocSummary(**cached["summary"])
+
+    return write_summary(doc_config, get_spec(doc_id))
+
+
+def spec_cache_filename(doc_id: str):
+    return TMP_DIR / f"{doc_id}.spec"
+
+
+@contextmanager
+def paused_gc():
+    # Loading a spec creates many objects and no cycles, and would otherwise
+    # set off the cyclic garbage collector over and over.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def read_cached_spec(cache_filename, key: list) -> Optional[Spec]:
+    try:
+        # Much faster than marshal.load, which reads the file piece by piece.
+        with open(cache_filename, "rb") as f:
+            cached = marshal.loads(f.read())
+    except (FileNotFoundError, EOFError, ValueError, TypeError):
+        return None
+
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    with paused_gc():
+        return Spec.from_record(cached["spec"])
+
+
+def write_cached_spec(cache_filename, key: list, spec: Spec):
+    write_bytes(cache_filename, marshal.dumps({"key": key, "spec": spec.to_record()}))
+
+
+def get_spec(doc_id: str, doc_config: Optional[DocConfig] = None) -> Spec:
+    """Load tmp/<doc_id>.md, from its cache if unchanged.
+
+    Otherwise the spec comes from the shared cache when one is enabled, or is
+    parsed. When doc_config is given, a spec not read from the document's own
+    cache also refreshes the document's summary.
+    """
+    md_filename = f"{TMP_DIR}/{doc_id}.md"
+    cache_filename = spec_cache_filename(doc_id)
+    digest = file_digest(md_filename)
+    # marshal's format may change between Python versions.
+    key = [SPEC_CACHE_VERSION, marshal.version, md_spec.PARSER_VERSION, digest]
+
+    with span("read cache"):
+        spec = read_cached_spec(cache_filename, key)
+
+    own_cache = spec is not None
+    if not own_cache:
+        spec = SHARED_CACHE.get_spec(key, cache_filename)
+        if spec is None and SHARED_CACHE.get_spec_file(key, cache_filename):
+            with span("read shared cache"):
+                spec = read_cached_spec(cache_filename, key)
+            if spec is None:
+                # Unreadable, so parse and share the spec again.
+                SHARED_CACHE.drop_spec_file(key)
+            else:
+                SHARED_CACHE.put_spec(key, spec, cache_filename)
+        if spec is None:
+            with span("parse"):
+                spec = md_spec.parse_file(md_filename)
+            with span("write cache"):
+                write_cached_spec(cache_filename, key, spec)
+            SHARED_CACHE.put_spec(key, spec, cache_filename)
+
+    spec.filename = md_filename
+    spec.digest = digest
+    if not own_cache and doc_config is not None:
+        write_summary(doc_config, spec)
+    return spec
+
+
+@dataclass
+class DocColumns:
+    """Rows one document contributes to the ReqDB tables, as plain columns."""
+    req_ids: list[str] = field(default_factory=list)
+    contents: list[str] = field(default_factory=list)
+    trace_req_ids: list[str] = field(default_factory=list)
+    trace_to_req_ids: list[str] = field(default_factory=list)
+    signal_names: list[str] = field(default_factory=list)
+    signal_modified: list[bool] = field(default_factory=list)
+    signal_req_ids: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_spec(cls, spec: Spec) -> "DocColumns":
+        columns = cls()
+        for req in spec.reqs:
+            columns.req_ids.append(req.id)
+            columns.contents.append(req.content)
+
+            for req_trace_id in req.req_trace_ids:
+                columns.trace_req_ids.append(req.id)
+                columns.trace_to_req_ids.append(req_trace_id)
+
+            for signal in req.signals:
+                columns.signal_names.append(signal)
+                columns.signal_modified.append(False)
+                columns.signal_req_ids.append(req.id)
+
+            for signal in req.mod_signals:
+                columns.signal_names.append(signal)
+                columns.signal_modified.append(True)
+                columns.signal_req_ids.append(req.id)
+
+        return columns
+
+
+def load_doc_columns(doc_id: str, doc_config: DocConfig) -> tuple[str, DocColumns]:
+    """Digest and columns of a document's spec."""
+    spec = get_spec(doc_id, doc_config)
+    return spec.digest, DocColumns.from_spec(spec)
+
+
+def load_doc_columns_job(args: tuple) -> tuple[str, str, DocColumns, float]:
+    """Load a document in a worker, which sends back only its columns."""
+    folder, doc_id, doc_config = args
+    start = time.perf_counter()
+    # A worker may serve several projects, so work in this one's folder.
+    os.chdir(folder)
+    digest, columns = load_doc_columns(doc_id, doc_config)
+    return doc_id, digest, columns, time.perf_counter() - start
@@ -1,50 +1,66 @@
-from typing import Optional
-import pandas as pd
+from collections import Counter
+from typing import Iterable, Optional
 from rich.console import Console
 from rich.table import Table
 
 from wordreqs2.config import ProjConfig
-from .load import ReqDB
+from .profiling import span
+from .spec_cache import get_summary, int_or_default
 
 
-def int_or_default(x: str, default: int):
-    try:
-        return int(x)
-    except ValueError:
-        return default
+def find_next_ids(doc_req_ids: Iterable[tuple[str, str]],
+                  prefix_map: dict[str, str]) -> dict[str, str]:
+    """Next ID after the highest numbered requirement of each document."""
+    max_nums = {}
+    for doc_id, req_id in doc_req_ids:
+        num = int_or_default(req_id.replace(prefix_map[doc_id], ""), 0)
+        max_nums[doc_id] = max(max_nums.get(doc_id, num), num)
 
+    return {doc_id: prefix_map[doc_id] + str(num + 1)
+            for doc_id, num in max_nums.items()}
 
-def find_next_id(reqs, prefix_map) -> pd.Series:
-    reqs["prefix"] = reqs.doc_id.apply(lambda doc_id: prefix_map[doc_id])
-    reqs["req_num"] = [int_or_default(id.replace(prefix, ""), 0)
-                       for id, prefix in zip(reqs.req_id, reqs.prefix)]
-
-    reqs_max = reqs.groupby("doc_id").max()
-    reqs_max.req_num += 1
-    
-    next_req_id = reqs_max.prefix + reqs_max.req_num.astype(str)
-    next_req_id.name = "next_req_id"
-    return next_req_id
-
-
-def run_status(db: ReqDB, config: ProjConfig, docs_filter: Optional[list[str]]=None):
-    prefix_map = {doc_id: doc_config.req_id_prefix
-                  for doc_id, doc_config in config.docs.items()}
-
-    req_counts = db.reqs.groupby("doc_id").count().req_id
-    next_req_id = find_next_id(db.reqs, prefix_map)
-    status = pd.concat([req_counts, next_req_id], axis=1)
 
+def print_status(req_counts: dict[str, int], next_req_ids: dict[str, str],
+                 config: ProjConfig, docs_filter: Optional[list[str]]=None):
     table = Table()
     table.add_column("Doc ID")
     table.add_column("Next ID")
     table.add_column("Count", justify="right")
 
     docs_filter = docs_filter or list(config.docs.keys())
-    status = status[status.index.isin(docs_filter)]
 
-    for doc_id, row in status.iterrows():
-        table.add_row(str(doc_id), str(row.next_req_id), str(row.req_id))
+    for doc_id in sorted(req_counts):
+        if doc_id in docs_filter and req_counts[doc_id] > 0:
+            table.add_row(doc_id, next_req_ids[doc_id], str(req_counts[doc_id]))
 
     console = Console()
-    console.print(table)
\ No newline at end of file
+    console.print(table)
+
+
+def run_status(db, config: ProjConfig, docs_filter: Optional[list[str]]=None):
+    prefix_map = {doc_id: doc_config.req_id_prefix
+                  for doc_id, doc_config in config.docs.items()}
+    doc_req_ids = list(zip(db.reqs.doc_id, db.reqs.req_id))
+
+    with span("count reqs"):
+        req_counts = Counter(doc_id for doc_id, _ in doc_req_ids)
+    with span("next ids"):
+        next_req_ids = find_next_ids(doc_req_ids, prefix_map)
+
+    print_status(req_counts, next_req_ids, config, docs_filter)
+
+
+def run_status_from_summaries(config: ProjConfig, docs_filter: Optional[list[str]]=None):
+    """Status from the per-document summaries, without reading the specs."""
+    req_counts = {}
+    next_req_ids = {}
+    for doc_id in docs_filter or list(config.docs.keys()):
+        if doc_id not in config.docs:
+            continue
+        doc_config = config.docs[doc_id]
+        with span(f"summary {doc_id}"):
+            summary = get_summary(doc_config)
+        req_counts[doc_id] = summary.count
+        next_req_ids[doc_id] = summary.next_id(doc_config.req_id_prefix)
+
+    print_status(req_counts, next_req_ids, config, docs_filter)
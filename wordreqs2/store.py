@@ -0,0 +1,225 @@
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from wordreqs2.config import ProjConfig
+from .cache import TMP_DIR, file_digest, key_digest
+from .md_spec import plain_text
+from .spec_cache import DocColumns, get_spec
+
+
+# Bump when the schema changes so the store is rebuilt.
+STORE_VERSION = 5
+STORE_FILENAME = TMP_DIR / "wreqs.sqlite"
+
+SCHEMA = """
+CREATE TABLE docs (
+    doc_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL
+);
+CREATE TABLE reqs (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    req_id TEXT NOT NULL,
+    contents TEXT NOT NULL,
+    is_deleted INTEGER NOT NULL
+);
+CREATE INDEX reqs_doc_req ON reqs (doc_id, req_id);
+CREATE INDEX reqs_req ON reqs (req_id);
+CREATE TABLE traces (
+    doc_id TEXT NOT NULL,
+    req_id TEXT NOT NULL,
+    to_doc_id TEXT NOT NULL,
+    to_req_id TEXT NOT NULL
+);
+CREATE INDEX traces_from ON traces (doc_id, req_id);
+CREATE INDEX traces_to ON traces (to_doc_id, to_req_id);
+CREATE INDEX traces_to_req ON traces (to_req_id);
+CREATE INDEX traces_req ON traces (req_id);
+CREATE TABLE signals (
+    name TEXT NOT NULL,
+    modified INTEGER NOT NULL,
+    doc_id TEXT NOT NULL,
+    req_id TEXT NOT NULL
+);
+CREATE INDEX signals_name ON signals (name, modified);
+CREATE INDEX signals_doc ON signals (doc_id);
+"""
+
+# Kept apart from SCHEMA, as SQLite may be built without FTS5. Each row is
+# the plain text of a requirement, under its reqs id.
+TEXT_SCHEMA = "CREATE VIRTUAL TABLE reqs_text USING fts5 (text)"
+
+DOC_TABLES = ["docs", "reqs", "traces", "signals"]
+TABLES = DOC_TABLES + ["reqs_text"]
+
+
+def match_expression(terms: list[str]) -> str:
+    """FTS5 query matching all terms, where a term with spaces is a phrase
+    and a term ending in * is a prefix."""
+    parts = []
+    for term in terms:
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        parts.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(parts)
+
+
+class ReqStore:
+    """Requirements, traces and signals kept in SQLite between runs."""
+
+    def __init__(self, filename=STORE_FILENAME):
+        Path(filename).parent.mkdir(exist_ok=True)
+        self.conn = sqlite3.connect(filename)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.create_function("plain_text", 1, plain_text, deterministic=True)
+
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != STORE_VERSION:
+            with self.conn:
+                for table in TABLES:
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self.conn.executescript(SCHEMA)
+                self.conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+        with self.conn:
+            self.has_text = (self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'reqs_text'"
+            ).fetchone() is not None or self.create_text_index())
+
+    def create_text_index(self) -> bool:
+        """Create and fill reqs_text, unless this SQLite has no FTS5."""
+        try:
+            self.conn.execute(TEXT_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+        self.conn.execute("INSERT INTO reqs_text (rowid, text)"
+                          " SELECT id, plain_text(contents) FROM reqs")
+        return True
+
+    def close(self):
+        self.conn.close()
+
+    def sync(self, config: ProjConfig) -> list[str]:
+        """Reload the documents whose markdown or config changed."""
+        stored = dict(self.conn.execute("SELECT doc_id, fingerprint FROM docs"))
+        changed = []
+
+        with self.conn:
+            for doc_id in set(stored) - set(config.docs):
+                self.delete_doc(doc_id)
+
+            for doc_id, doc_config in config.docs.items():
+                fingerprint = key_digest(file_digest(TMP_DIR / f"{doc_id}.md"),
+                                         doc_config.parent, doc_config.deleted)
+                if stored.get(doc_id) == fingerprint:
+                    continue
+
+                self.delete_doc(doc_id)
+                self.insert_doc(doc_id, config, DocColumns.from_spec(get_spec(doc_id, doc_config)))
+                self.conn.execute("INSERT INTO docs VALUES (?, ?)", (doc_id, fingerprint))
+                changed.append(doc_id)
+
+        return changed
+
+    def delete_doc(self, doc_id: str):
+        if self.has_text:
+            self.conn.execute(
+                "DELETE FROM reqs_text WHERE rowid IN (SELECT id FROM reqs WHERE doc_id = ?)",
+                (doc_id,)
+            )
+        for table in DOC_TABLES:
+            self.conn.execute(f"DELETE FROM {table} WHERE doc_id = ?", (doc_id,))
+
+    def insert_doc(self, doc_id: str, config: ProjConfig, columns: DocColumns):
+        doc_config = config.docs[doc_id]
+        self.conn.executemany(
+            "INSERT INTO reqs (doc_id, req_id, contents, is_deleted) VALUES (?, ?, ?, ?)",
+            ((doc_id, req_id, contents, contents == doc_config.deleted)
+             for req_id, contents in zip(columns.req_ids, columns.contents))
+        )
+        if self.has_text:
+            self.conn.execute(
+                "INSERT INTO reqs_text (rowid, text)"
+                " SELECT id, plain_text(contents) FROM reqs WHERE doc_id = ?",
+                (doc_id,)
+            )
+
+        if doc_config.parent is not None:
+            self.conn.executemany(
+                "INSERT INTO traces VALUES (?, ?, ?, ?)",
+                ((doc_id, req_id, doc_config.parent, to_req_id)
+                 for req_id, to_req_id in zip(columns.trace_req_ids,
+                                              columns.trace_to_req_ids))
+            )
+
+        self.conn.executemany(
+            "INSERT INTO signals VALUES (?, ?, ?, ?)",
+            ((name, modified, doc_id, req_id)
+             for name, modified, req_id in zip(columns.signal_names,
+                                               columns.signal_modified,
+                                               columns.signal_req_ids))
+        )
+
+    def filtered(self, sql: str, params: list, column: str,
+                 doc_ids: Optional[list[str]], order_by: str = "") -> list[sqlite3.Row]:
+        """Rows for sql, only those whose column is in doc_ids if given.
+
+        The filter is left out of the query without doc_ids, rather than
+        matching NULL, so SQLite can use the indexes on the other conditions.
+        """
+        if doc_ids is not None:
+            sql += f" AND {column} IN ({', '.join('?' * len(doc_ids))})"
+            params = params + list(doc_ids)
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        return self.conn.execute(sql, params).fetchall()
+
+    def req(self, req_id: str, doc_ids: Optional[list[str]] = None) -> list[sqlite3.Row]:
+        return self.filtered(
+            "SELECT doc_id, req_id, contents FROM reqs WHERE req_id = ?",
+            [req_id], "doc_id", doc_ids
+        )
+
+    def children(self, req_id: str, doc_ids: Optional[list[str]] = None) -> list[sqlite3.Row]:
+        return self.filtered(
+            "SELECT r.doc_id, r.req_id, r.contents FROM traces t"
+            " JOIN reqs r ON r.doc_id = t.doc_id AND r.req_id = t.req_id"
+            " WHERE t.to_req_id = ?",
+            [req_id], "t.doc_id", doc_ids
+        )
+
+    def parents(self, req_id: str, doc_ids: Optional[list[str]] = None) -> list[sqlite3.Row]:
+        return self.filtered(
+            "SELECT r.doc_id, r.req_id, r.contents FROM traces t"
+            " JOIN reqs r ON r.doc_id = t.to_doc_id AND r.req_id = t.to_req_id"
+            " WHERE t.req_id = ?",
+            [req_id], "t.to_doc_id", doc_ids
+        )
+
+    def signal_reqs(self, name: str, modified: bool,
+                    doc_ids: Optional[list[str]] = None) -> list[sqlite3.Row]:
+        return self.filtered(
+            "SELECT r.doc_id, r.req_id, r.contents FROM signals s"
+            " JOIN reqs r ON r.doc_id = s.doc_id AND r.req_id = s.req_id"
+            " WHERE s.name = ? AND s.modified = ?",
+            [name, modified], "s.doc_id", doc_ids
+        )
+
+    def setters(self, name: str, doc_ids: Optional[list[str]] = None) -> list[sqlite3.Row]:
+        return self.signal_reqs(name, True, doc_ids)
+
+    def readers(self, name: str, doc_ids: Optional[list[str]] = None) -> list[sqlite3.Row]:
+        return self.signal_reqs(name, False, doc_ids)
+
+    def search(self, terms: list[str],
+               doc_ids: Optional[list[str]] = None) -> list[sqlite3.Row]:
+        if not self.has_text:
+            raise Exception("Search needs SQLite with FTS5, which this Python's sqlite3 lacks.")
+
+        return self.filtered(
+            "SELECT r.doc_id, r.req_id, r.contents FROM reqs_text t"
+            " JOIN reqs r ON r.id = t.rowid"
+            " WHERE reqs_text MATCH ?",
+            [match_expression(terms)], "r.doc_id", doc_ids, order_by="t.rowid"
+        )
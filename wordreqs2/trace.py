@@ -1,52 +1,143 @@
+from collections import Counter, defaultdict
 from typing import Optional
 from pandas import DataFrame
 from rich.console import Console
 from rich.table import Table
 
-from wordreqs2.config import ProjConfig
+from wordreqs2.config import ProjConfig, TraceConfig
 from .load import ReqDB
+from .profiling import span
 
 
-def trace_down(parent: str, children: list[str], reqs: DataFrame, traces: DataFrame):
-    parent_reqs = reqs[reqs.doc_id == parent]
-    reqs_count = len(parent_reqs)
-    
-    print(f"Tracing requirements from {parent} to {', '.join(children)}")
+Node = tuple[str, str]  # (doc_id, req_id)
 
-    joined = parent_reqs.merge(
-        traces, how="left",
-        left_on=["doc_id", "req_id"],
-        right_on=["to_doc_id", "to_req_id"],
-        validate="one_to_many",
-        suffixes=(None, "_child")
-    )
 
-    joined = joined.drop(["to_doc_id", "to_req_id"], axis=1)
-    joined.doc_id_child = joined.doc_id_child.fillna("(untraced)")
-    counts = joined.groupby("doc_id_child").count().doc_id
+class TraceGraph:
+    """Trace links between requirements, indexed in both directions."""
+
+    def __init__(self, reqs: DataFrame, traces: DataFrame):
+        self.doc_reqs = defaultdict(list)
+        for doc_id, req_id in zip(reqs.doc_id, reqs.req_id):
+            self.doc_reqs[doc_id].append(req_id)
+        self.nodes = {(doc_id, req_id)
+                      for doc_id, req_ids in self.doc_reqs.items()
+                      for req_id in req_ids}
+
+        self.children = defaultdict(list)
+        self.parents = defaultdict(list)
+        for doc_id, req_id, to_doc_id, to_req_id in zip(
+                traces.doc_id, traces.req_id, traces.to_doc_id, traces.to_req_id):
+            # Links to parents that don't exist are reported by lint instead.
+            if (to_doc_id, to_req_id) not in self.nodes:
+                continue
+            self.children[(to_doc_id, to_req_id)].append((doc_id, req_id))
+            self.parents[(doc_id, req_id)].append((to_doc_id, to_req_id))
+
+    def links(self, direction: str) -> dict[Node, list[Node]]:
+        return self.children if direction == "down" else self.parents
+
+    def link_counts(self, doc_id: str, direction: str) -> Counter:
+        """Number of links per linked document, plus untraced requirements."""
+        links = self.links(direction)
+        counts = Counter()
+        for req_id in self.doc_reqs[doc_id]:
+            linked = links.get((doc_id, req_id), [])
+            if not linked:
+                counts["(untraced)"] += 1
+            for linked_doc_id, _ in linked:
+                counts[linked_doc_id] += 1
+        return counts
+
+    def coverage(self, doc_id: str, direction: str, levels: list[list[str]]) -> list[int]:
+        """Requirements of doc_id reaching each level of documents."""
+        links = self.links(direction)
+        covered = [0] * len(levels)
+
+        for req_id in self.doc_reqs[doc_id]:
+            frontier = {(doc_id, req_id)}
+            for i, level_docs in enumerate(levels):
+                frontier = {linked for node in frontier
+                            for linked in links.get(node, [])
+                            if linked[0] in level_docs}
+                if not frontier:
+                    break
+                covered[i] += 1
+
+        return covered
+
+
+def trace_levels(config: ProjConfig, trace_config: TraceConfig) -> list[list[str]]:
+    """Documents at each level of the trace, following DocConfig.parent."""
+    levels = [trace_config.to]
+
+    while len(levels) < trace_config.levels:
+        if trace_config.direction == "down":
+            next_level = [doc_id for doc_id, doc_config in config.docs.items()
+                          if doc_config.parent in levels[-1]]
+        else:
+            next_level = list(dict.fromkeys(
+                config.docs[doc_id].parent for doc_id in levels[-1]
+                if doc_id in config.docs and config.docs[doc_id].parent is not None
+            ))
+
+        if not next_level:
+            break
+        levels.append(next_level)
+
+    return levels
+
+
+def run_trace(graph: TraceGraph, config: ProjConfig, trace_config: TraceConfig):
+    doc_id = trace_config.from_
+    direction = trace_config.direction
+    reqs_count = len(graph.doc_reqs[doc_id])
+
+    if direction == "down":
+        print(f"Tracing requirements from {doc_id} to {', '.join(trace_config.to)}")
+    else:
+        print(f"Tracing requirements from {doc_id} up to {', '.join(trace_config.to)}")
+
+    counts = graph.link_counts(doc_id, direction)
 
     table = Table()
     table.add_column()
     table.add_column("Count", justify="right")
 
-    table.add_row(f"Total {parent} requirements", str(reqs_count))
+    table.add_row(f"Total {doc_id} requirements", str(reqs_count))
 
-    for doc, count in counts.items():
-        table.add_row(doc, str(count))
+    for doc in sorted(counts):
+        table.add_row(doc, str(counts[doc]))
 
     console = Console()
     console.print(table)
 
+    if trace_config.levels > 1:
+        levels = trace_levels(config, trace_config)
+        covered = graph.coverage(doc_id, direction, levels)
+
+        table = Table(title=f"{doc_id} coverage by level")
+        table.add_column("Level", justify="right")
+        table.add_column("Documents")
+        table.add_column("Covered", justify="right")
+        table.add_column("Untraced", justify="right")
+
+        for level, (level_docs, count) in enumerate(zip(levels, covered), start=1):
+            table.add_row(str(level), ", ".join(level_docs), str(count),
+                          str(reqs_count - count))
+
+        console.print(table)
+
 
 def run_traces(db: ReqDB, config: ProjConfig, docs_filter: Optional[list[str]]=None):
     docs_filter = docs_filter or list(config.docs.keys())
+    with span("trace graph"):
+        graph = TraceGraph(db.reqs, db.traces)
 
     for trace_id, trace_config in config.traces.items():
         involved_docs = [trace_config.from_] + trace_config.to
         if (set(involved_docs).intersection(set(docs_filter))) == set():
             continue
 
-        if trace_config.direction == "down":
-            parent = trace_config.from_
-            children = trace_config.to
-            trace_down(parent, children, db.reqs, db.traces)
\ No newline at end of file
+        if trace_config.direction in ("down", "up"):
+            with span(trace_id):
+                run_trace(graph, config, trace_config)
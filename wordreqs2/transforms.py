@@ -0,0 +1,67 @@
+import time
+from typing import Callable, Union
+
+from .docx_to_md import word_bytes_to_md, newline_after_meta_text
+from .docx_native import word_bytes_to_md_native
+
+
+# Transforms pass the document between each other in memory. The source file
+# arrives as bytes, and each transform returns markdown text.
+Content = Union[bytes, str]
+Transform = Callable[[Content], str]
+
+TRANSFORMS: dict[str, Transform] = {}
+
+
+def register_transform(name: str):
+    """Make a function usable by name in the transforms list of wreqs.toml."""
+    def register(transform: Transform) -> Transform:
+        TRANSFORMS[name] = transform
+        return transform
+    return register
+
+
+def as_text(content: Content) -> str:
+    if isinstance(content, bytes):
+        return content.decode("utf8").replace("\r\n", "\n")
+    return content
+
+
+def as_bytes(content: Content) -> bytes:
+    if isinstance(content, str):
+        return content.encode("utf8")
+    return content
+
+
+@register_transform("docx-to-md")
+def docx_to_md(content: Content) -> str:
+    return word_bytes_to_md(as_bytes(content))
+
+
+@register_transform("docx-native")
+def docx_native(content: Content) -> str:
+    return word_bytes_to_md_native(as_bytes(content))
+
+
+@register_transform("newline-after-meta")
+def newline_after_meta(content: Content) -> str:
+    return newline_after_meta_text(as_text(content))
+
+
+def get_transform(name: str) -> Transform:
+    try:
+        return TRANSFORMS[name]
+    except KeyError:
+        raise ValueError(f"Unknown transform {name}. "
+                         f"Available transforms are {', '.join(TRANSFORMS)}") from None
+
+
+def apply_transforms(content: Content, transforms: list[str],
+                     on_done: Callable[[str, float], None]) -> Content:
+    """Run the transforms in order, calling on_done with each one's duration."""
+    for name in transforms:
+        transform = get_transform(name)
+        start = time.perf_counter()
+        content = transform(content)
+        on_done(name, time.perf_counter() - start)
+    return content
@@ -0,0 +1,74 @@
+import os
+import time
+from typing import Optional
+
+from wordreqs2.config import ProjConfig, DocConfig
+from .load import ReqDB
+from .prepare import run_prepare, iter_prepare, copy_docs
+from .status import run_status
+from .lint import run_lint
+from .trace import run_traces
+
+
+def source_paths(doc_config: DocConfig) -> list[str]:
+    return [path for path in (doc_config.import_from, doc_config.file)
+            if path is not None]
+
+
+def stat_or_none(path: str) -> Optional[tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def snapshot(config: ProjConfig) -> dict[str, list]:
+    return {doc_id: [stat_or_none(path) for path in source_paths(doc_config)]
+            for doc_id, doc_config in config.docs.items()}
+
+
+def report(db: ReqDB, config: ProjConfig, actions: list[str],
+           docs_filter: Optional[list[str]]):
+    for action in actions:
+        if action == "trace":
+            run_traces(db, config, docs_filter=docs_filter)
+        elif action == "status":
+            run_status(db, config, docs_filter=docs_filter)
+        elif action == "lint":
+            run_lint(db, config, docs_filter=docs_filter)
+
+
+def run_watch(config: ProjConfig, actions: list[str],
+              docs_filter: Optional[list[str]] = None, interval: float = 1.0):
+    copy_docs(config.docs, config.workers)
+    db = ReqDB(config, iter_prepare(config.docs, config.workers))
+    report(db, config, actions, docs_filter)
+
+    state = snapshot(config)
+    print(f"👀 Watching {len(config.docs)} documents. Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            time.sleep(interval)
+            new_state = snapshot(config)
+            changed = [doc_id for doc_id in config.docs
+                       if new_state[doc_id] != state[doc_id]]
+            if not changed:
+                continue
+
+            print(f"\n🔄 Changed: {', '.join(changed)}")
+            doc_configs = {doc_id: config.docs[doc_id] for doc_id in changed}
+            try:
+                copy_docs(doc_configs, config.workers)
+                run_prepare(doc_configs, config.workers)
+                db.update_docs(config, changed)
+                report(db, config, actions, docs_filter)
+            except Exception as e:
+                # A document may be mid-save; retry on the next change.
+                print(f"❌ {e}")
+
+            # Importing rewrites the project copy, so only react to later edits.
+            state = snapshot(config)
+    except KeyboardInterrupt:
+        pass